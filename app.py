@@ -1,14 +1,25 @@
+import base64
+import json
+import os
 from datetime import datetime
-from typing import List, Optional
+from typing import Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlencode
 
-from fastapi import FastAPI, Depends, Query, HTTPException
+from fastapi import FastAPI, Depends, Query, HTTPException, Request, Response
 from fastapi.responses import HTMLResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-
-from database import SessionLocal
-from models import Article
+from sqlalchemy import Select, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from compression import encode_body, precompress, should_compress
+from content_version import aread_content_version
+from database import AsyncSessionLocal, pool_metrics
+from front_page import abuild_front_page, aload_front_page, dumps_front_page
+from models import LIST_COLUMNS, Article
+from response_cache import ResponseCache, make_etag
+from search import search_query
+from serialization import dumps_json
 from bot.fetch_sources import LEAGUE_CONFIG
 
 app = FastAPI()
@@ -20,15 +31,140 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # ---------- DB dependency ----------
-def get_db():
-    db = SessionLocal()
-    try:
+# async sesija: request ne zauzima thread dok čeka Postgres
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+# ---------- Keš odgovora ----------
+# Podaci se menjaju samo kad worker upiše članke (svakih ~10 min), pa
+# čitanja služimo iz memorije. Keš se briše kad worker poveća content_version.
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2000"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "600"))
+RESPONSE_CACHE_VERSION_CHECK_SECONDS = float(
+    os.getenv("RESPONSE_CACHE_VERSION_CHECK_SECONDS", "5")
+)
+
+
+response_cache = ResponseCache(
+    max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+    ttl_seconds=RESPONSE_CACHE_TTL_SECONDS,
+    version_check_seconds=RESPONSE_CACHE_VERSION_CHECK_SECONDS,
+)
+
+
+async def _refresh_cache_version(db: AsyncSession) -> None:
+    if not response_cache.version_check_due():
+        return
+    try:
+        version = await aread_content_version(db)
+    except Exception:
+        await db.rollback()
+        version = None
+    response_cache.set_version(version)
+
+
+# Cache-Control po tipu rute (browser / CDN); stale-while-revalidate pušta
+# klijenta da odmah dobije staru verziju dok se nova proverava u pozadini.
+CACHE_CONTROL_LIST = os.getenv(
+    "CACHE_CONTROL_LIST", "public, max-age=60, stale-while-revalidate=300"
+)
+CACHE_CONTROL_DETAIL = os.getenv(
+    "CACHE_CONTROL_DETAIL", "public, max-age=300, stale-while-revalidate=3600"
+)
+CACHE_CONTROL_META = os.getenv(
+    "CACHE_CONTROL_META", "public, max-age=3600, stale-while-revalidate=86400"
+)
+
+
+def _cache_key(request: Request) -> str:
+    params = sorted(request.query_params.multi_items())
+    return f"{request.url.path}?{urlencode(params)}"
+
+
+def _dumps(data) -> bytes:
+    return dumps_json(data)
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match koristi "weak" poređenje -> ignorišemo W/ prefiks
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def _json_response(
+    request: Request,
+    body: bytes,
+    etag: str,
+    cache_control: str,
+    headers: Optional[Dict[str, str]] = None,
+    variants: Optional[Dict[str, bytes]] = None,
+) -> Response:
+    """
+    JSON response with ETag + Cache-Control; 304 (no body) if the client
+    already has this exact version. The body is gzip/brotli compressed
+    per Accept-Encoding; `variants` memoizes compressed bodies.
+    """
+    out_headers = dict(headers or {})
+    out_headers["Cache-Control"] = cache_control
+
+    content, encoding = encode_body(body, request.headers.get("accept-encoding"), variants)
+    if encoding:
+        # isti sadržaj, drugi bajtovi -> weak ETag (kao nginx gzip)
+        out_headers["ETag"] = "W/" + etag
+        out_headers["Content-Encoding"] = encoding
+    else:
+        out_headers["ETag"] = etag
+    if should_compress(body):
+        out_headers["Vary"] = "Accept-Encoding"
+
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=out_headers)
+
+    return Response(content=content, media_type="application/json", headers=out_headers)
+
+
+async def _cached_json(
+    request: Request,
+    db: AsyncSession,
+    load: Callable[[Dict[str, str]], Awaitable[object]],
+    cache_control: str = CACHE_CONTROL_LIST,
+) -> Response:
+    """
+    Serve pre-serialized JSON from the response cache; on a miss await
+    `load(headers)` (it may add response headers) and cache the bytes.
+    `load` may also return ready JSON bytes.
+    """
+    await _refresh_cache_version(db)
+
+    key = _cache_key(request)
+    entry = response_cache.get(key)
+    if entry is None:
+        # verzija pre čitanja: ako se promeni dok load() traje, telo ne keširamo
+        version = response_cache.version
+        headers: Dict[str, str] = {}
+        data = await load(headers)
+        body = data if isinstance(data, bytes) else _dumps(data)
+        entry = response_cache.set(key, body, headers, version)
+
+    return _json_response(
+        request, entry.body, entry.etag, cache_control, entry.headers, entry.variants
+    )
 
 
 # ---------- Pydantic schema za izlaz ----------
@@ -49,9 +185,78 @@ class ArticleOut(BaseModel):
         orm_mode = True
 
 
+# Liste čitaju samo kolone iz ArticleOut (models.LIST_COLUMNS) – bez
+# content/ai_content Text kolona
+def _list_query() -> Select:
+    return select(*LIST_COLUMNS)
+
+
+def _rows_to_dicts(rows) -> List[dict]:
+    # Row -> dict direktno, bez pravljenja ORM objekata
+    return [dict(row._mapping) for row in rows]
+
+
+# ---------- Keyset (cursor) paginacija ----------
+# ?after=<cursor> umesto offset-a: strana N košta isto kao strana 1.
+# Cursor sledeće strane se vraća u X-Next-Cursor header-u.
+
+def _pack_cursor(values: list) -> str:
+    raw = json.dumps(values)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _unpack_cursor(cursor: str) -> list:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded))
+
+
+def _encode_cursor(article) -> str:
+    return _pack_cursor([article.created_at.isoformat(), article.id])
+
+
+def _decode_cursor(cursor: str):
+    try:
+        created_at, article_id = _unpack_cursor(cursor)
+        return datetime.fromisoformat(created_at), int(article_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def _paginate(
+    db: AsyncSession,
+    query: Select,
+    headers: Dict[str, str],
+    limit: int,
+    offset: int = 0,
+    after: Optional[str] = None,
+    sort: str = "newest",
+):
+    """
+    Order by (created_at, id) and page by cursor (`after`) or offset.
+    """
+    key = tuple_(Article.created_at, Article.id)
+
+    if after:
+        cursor = tuple_(*_decode_cursor(after))
+        query = query.where(key > cursor if sort == "oldest" else key < cursor)
+        offset = 0
+
+    if sort == "oldest":
+        query = query.order_by(Article.created_at.asc(), Article.id.asc())
+    else:
+        query = query.order_by(Article.created_at.desc(), Article.id.desc())
+
+    rows = (await db.execute(query.offset(offset).limit(limit))).all()
+
+    if len(rows) == limit and rows[-1].created_at is not None:
+        headers["X-Next-Cursor"] = _encode_cursor(rows[-1])
+
+    return _rows_to_dicts(rows)
+
+
 # ---------- Root i health ----------
 @app.get("/", response_class=HTMLResponse)
-def root():
+async def root():
     return """
     <h1>AllBallSports backend is running ✅</h1>
     <p>Try <a href="/health">/health</a> or <a href="/articles">/articles</a></p>
@@ -59,121 +264,218 @@ def root():
 
 
 @app.get("/health")
-def health():
+async def health():
     return {"status": "ok"}
 
 
+@app.get("/health/db")
+async def health_db():
+    # zauzeće pool-a (checked_out / overflow / čekanje na konekciju)
+    return pool_metrics()
+
+
 # ---------- Glavni /articles endpoint ----------
 @app.get("/articles", response_model=List[ArticleOut])
-def list_articles(
-    db: Session = Depends(get_db),
+async def list_articles(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     sport: Optional[str] = Query(None),
     league: Optional[str] = Query(None),
     country: Optional[str] = Query(None),
     sort: str = Query("newest", regex="^(newest|oldest)$"),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    after: Optional[str] = Query(None),
 ):
-    query = db.query(Article)
+    async def load(headers):
+        query = _list_query()
 
-    if sport:
-        query = query.filter(Article.sport == sport)
+        if sport:
+            query = query.where(Article.sport == sport)
 
-    if league:
-        query = query.filter(Article.league == league)
+        if league:
+            query = query.where(Article.league == league)
 
-    if country:
-        query = query.filter(Article.country == country)
+        if country:
+            query = query.where(Article.country == country)
 
-    if sort == "oldest":
-        query = query.order_by(Article.created_at.asc())
-    else:
-        query = query.order_by(Article.created_at.desc())
+        return await _paginate(db, query, headers, limit, offset, after, sort)
 
-    return query.offset(offset).limit(limit).all()
+    return await _cached_json(request, db, load)
 
 
 # ---------- Shortcut rute ----------
 @app.get("/articles/recent", response_model=List[ArticleOut])
-def recent_articles(
-    db: Session = Depends(get_db),
+async def recent_articles(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     limit: int = Query(20, ge=1, le=100),
 ):
-    return (
-        db.query(Article)
-        .order_by(Article.created_at.desc())
-        .limit(limit)
-        .all()
-    )
+    async def load(headers):
+        query = (
+            _list_query()
+            .order_by(Article.created_at.desc(), Article.id.desc())
+            .limit(limit)
+        )
+        return _rows_to_dicts((await db.execute(query)).all())
+
+    return await _cached_json(request, db, load)
 
 
 @app.get("/articles/by-league/{league}", response_model=List[ArticleOut])
-def articles_by_league(
+async def articles_by_league(
     league: str,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    after: Optional[str] = Query(None),
 ):
-    return (
-        db.query(Article)
-        .filter(Article.league == league)
-        .order_by(Article.created_at.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
-    )
+    async def load(headers):
+        query = _list_query().where(Article.league == league)
+        return await _paginate(db, query, headers, limit, offset, after)
+
+    return await _cached_json(request, db, load)
 
 
 @app.get("/articles/by-sport/{sport}", response_model=List[ArticleOut])
-def articles_by_sport(
+async def articles_by_sport(
     sport: str,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    after: Optional[str] = Query(None),
 ):
-    return (
-        db.query(Article)
-        .filter(Article.sport == sport)
-        .order_by(Article.created_at.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
-    )
+    async def load(headers):
+        query = _list_query().where(Article.sport == sport)
+        return await _paginate(db, query, headers, limit, offset, after)
+
+    return await _cached_json(request, db, load)
+
+
+# ---------- Naslovna ----------
+# Sve lige/sportovi u jednom odgovoru iz snapshot-a koji pravi worker
+# (front_page.py); ako snapshot još ne postoji, računa se odmah.
+@app.get("/articles/front-page")
+async def front_page(request: Request, db: AsyncSession = Depends(get_db)):
+    async def load(headers):
+        payload = await aload_front_page(db)
+        if payload is None:
+            payload = dumps_front_page(
+                await abuild_front_page(
+                    db,
+                    leagues=[cfg["league"] for cfg in LEAGUE_CONFIG],
+                    sports=[cfg["sport"] for cfg in LEAGUE_CONFIG],
+                )
+            )
+        return payload
+
+    return await _cached_json(request, db, load)
+
+
+# ---------- Pretraga ----------
+# Full-text indeks (Postgres tsvector + GIN, SQLite FTS5) – vidi search.py.
+# Rezultati po relevantnosti; sledeća strana preko X-Next-Cursor (rank, id).
+@app.get("/search", response_model=List[ArticleOut])
+async def search_articles(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    after: Optional[str] = Query(None),
+):
+    cursor = None
+    if after:
+        try:
+            rank, article_id = _unpack_cursor(after)
+            cursor = (float(rank), int(article_id))
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    async def load(headers):
+        query = search_query(db.bind.dialect.name, q, LIST_COLUMNS, cursor)
+        if query is None:
+            return []
+
+        rows = (await db.execute(query.limit(limit))).all()
+        if len(rows) == limit:
+            headers["X-Next-Cursor"] = _pack_cursor([rows[-1].rank, rows[-1].id])
+
+        results = _rows_to_dicts(rows)
+        for item in results:
+            item.pop("rank", None)
+        return results
+
+    return await _cached_json(request, db, load)
 
 
 # ---------- NOVA RUTA: jedan članak po slug-u ----------
 @app.get("/articles/{slug}")
-def get_article_by_slug(slug: str, db: Session = Depends(get_db)):
-    article = db.query(Article).filter(Article.slug == slug).first()
+async def get_article_by_slug(slug: str, request: Request, db: AsyncSession = Depends(get_db)):
+    return await _cached_json(
+        request,
+        db,
+        lambda headers: _load_article(db, slug),
+        cache_control=CACHE_CONTROL_DETAIL,
+    )
+
+
+async def _load_article(db: AsyncSession, slug: str) -> dict:
+    # vraćamo AI content ako postoji, fallback na content/summary
+    # (računa baza, pa se šalje samo jedan Text)
+    full_text = func.coalesce(
+        func.nullif(Article.ai_content, ""),
+        func.nullif(Article.content, ""),
+        Article.summary,
+    )
+
+    query = (
+        select(
+            Article.id,
+            Article.title,
+            Article.slug,
+            Article.sport,
+            Article.league,
+            Article.country,
+            Article.division,
+            Article.image_url,
+            Article.source_url,
+            Article.created_at,
+            full_text.label("content"),
+            Article.ai_generated,
+        )
+        .where(Article.slug == slug)
+        .limit(1)
+    )
+    article = (await db.execute(query)).first()
 
     if not article:
         raise HTTPException(status_code=404, detail="Article not found")
 
-    # vraćamo AI content ako postoji, fallback na content/summary
-    full_text = article.ai_content or article.content or article.summary
-
-    return {
-        "id": article.id,
-        "title": article.title,
-        "slug": article.slug,
-        "sport": article.sport,
-        "league": article.league,
-        "country": article.country,
-        "division": article.division,
-        "image_url": article.image_url,
-        "source_url": article.source_url,
-        "created_at": article.created_at,
-        "content": full_text,
-        "ai_generated": getattr(article, "ai_generated", False),
-    }
+    return dict(article._mapping)
 
 
 # ---------- Meta rute ----------
+# statični podaci – serijalizuju se (i kompresuju) jednom pri startu
+_LEAGUES_JSON = _dumps(LEAGUE_CONFIG)
+_LEAGUES_ETAG = make_etag(_LEAGUES_JSON)
+_LEAGUES_VARIANTS = precompress(_LEAGUES_JSON)
+
+_SPORTS_JSON = _dumps(sorted({cfg["sport"] for cfg in LEAGUE_CONFIG}))
+_SPORTS_ETAG = make_etag(_SPORTS_JSON)
+_SPORTS_VARIANTS = precompress(_SPORTS_JSON)
+
+
 @app.get("/meta/leagues")
-def list_leagues():
-    return LEAGUE_CONFIG
+async def list_leagues(request: Request):
+    return _json_response(
+        request, _LEAGUES_JSON, _LEAGUES_ETAG, CACHE_CONTROL_META, variants=_LEAGUES_VARIANTS
+    )
 
 
 @app.get("/meta/sports")
-def list_sports():
-    return sorted({cfg["sport"] for cfg in LEAGUE_CONFIG})
+async def list_sports(request: Request):
+    return _json_response(
+        request, _SPORTS_JSON, _SPORTS_ETAG, CACHE_CONTROL_META, variants=_SPORTS_VARIANTS
+    )
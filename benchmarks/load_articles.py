@@ -0,0 +1,128 @@
+"""
+Load test: /articles throughput at increasing concurrency.
+
+    python benchmarks/load_articles.py [--rows N] [--url URL] [--seconds S]
+
+Without --url it seeds a SQLite database (benchmarks/seed.py) and starts
+`uvicorn app:app` on it (one process, response cache off, so every
+request reads the DB). With --url it loads an already running server,
+e.g. one on Postgres. Each level keeps C requests in flight for S
+seconds, cycling /articles?league=...&limit=20.
+
+Results (SQLite, 100000 rows, one uvicorn process, 10s per level):
+
+concurrency    req/s      p50      p99   errors
+          1      211    4.7ms    7.0ms        0
+         10      211   46.4ms   74.6ms        0
+         50      125  268.0ms 2003.6ms        0
+        100       81  803.4ms 5033.7ms        0
+        200      127  914.7ms 6720.3ms        0
+
+That run was on a 1-CPU machine, with the client and the server sharing
+the core, so it is CPU bound from concurrency 1. It shows all 200
+requests in flight being served (more than the 40 threads of the old sync
+endpoints), not DB scaling. To measure DB scaling, run the client on
+another machine with --url against a Postgres-backed server.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from seed import LEAGUES, ROOT, seed
+
+LEVELS = (1, 10, 50, 100, 200)
+
+
+async def _load(client: httpx.AsyncClient, concurrency: int, seconds: float):
+    latencies, errors = [], 0
+    deadline = time.monotonic() + seconds
+
+    async def user(n: int):
+        nonlocal errors
+        i = n
+        while time.monotonic() < deadline:
+            league = LEAGUES[i % len(LEAGUES)]
+            i += concurrency
+            started = time.perf_counter()
+            try:
+                resp = await client.get(f"/articles?league={league}&limit=20")
+                if resp.status_code != 200:
+                    errors += 1
+                    continue
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.monotonic()
+    await asyncio.gather(*(user(n) for n in range(concurrency)))
+    return len(latencies) / (time.monotonic() - started), latencies, errors
+
+
+async def run(url: str, seconds: float) -> None:
+    limits = httpx.Limits(max_connections=max(LEVELS), max_keepalive_connections=max(LEVELS))
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        await _load(client, 1, 1)  # zagrevanje (pool, keš upita)
+        print(f"{'concurrency':>11} {'req/s':>8} {'p50':>8} {'p99':>8} {'errors':>8}")
+        for concurrency in LEVELS:
+            rate, latencies, errors = await _load(client, concurrency, seconds)
+            latencies.sort()
+            p50 = statistics.median(latencies) * 1000 if latencies else 0
+            p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0
+            print(f"{concurrency:>11} {rate:>8.0f} {p50:>6.1f}ms {p99:>6.1f}ms {errors:>8}")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(rows: int):
+    db_url = seed(rows)
+    port = _free_port()
+    env = dict(os.environ, DATABASE_URL=db_url, DB_ROLE="web", RESPONSE_CACHE_MAX_ENTRIES="0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{url}/health", timeout=1)
+            return server, url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.kill()
+    raise SystemExit("uvicorn did not start")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--url", help="running server to load instead of a local one")
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if not url:
+        server, url = _start_server(args.rows)
+    try:
+        asyncio.run(run(url, args.seconds))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Offset vs. keyset (?after=) paging on /articles at 1M rows.
+
+    python benchmarks/pagination.py [ROWS]            # default 1000000
+
+Requests go through the app (httpx ASGI transport, response cache off)
+to a seeded SQLite database (benchmarks/seed.py). For each depth the
+page of 20 rows starting there is read with ?offset= and with the
+cursor of the row before it. "no index" is the same offset query with
+the composite indexes disabled (SQLite NOT INDEXED), i.e. the cost
+before they were added.
+
+Results (SQLite, 1000000 rows, median of 5 requests):
+
+/articles
+     depth     offset     keyset   no index
+         0      3.5ms      3.0ms    356.5ms
+      1000      3.5ms      3.4ms    306.6ms
+     10000      3.6ms      2.6ms    335.5ms
+    100000     12.4ms      3.3ms    576.2ms
+    500000     49.5ms      3.5ms   1425.8ms
+/articles/by-league/league-3
+     depth     offset     keyset   no index
+         0      3.5ms      3.2ms    303.8ms
+      1000      3.6ms      3.5ms    297.3ms
+     10000      3.3ms      2.5ms    299.0ms
+     40000      7.7ms      3.4ms    368.3ms
+
+Offset cost grows with depth even on the index (rows are skipped one by
+one); keyset stays flat.
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+from seed import seed
+
+REPEAT = 5
+
+
+async def _median_ms(client, url: str) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        resp = await client.get(url)
+        timings.append(time.perf_counter() - started)
+        assert resp.status_code == 200 and len(resp.json()) == 20, (url, resp.status_code)
+    return statistics.median(timings) * 1000
+
+
+def _unindexed_ms(engine, league, depth) -> float:
+    from sqlalchemy import text
+
+    where = "WHERE league = :league" if league else ""
+    sql = text(
+        f"SELECT id, title, slug, sport, league, country, division, image_url, "
+        f"source_url, summary, created_at FROM articles NOT INDEXED {where} "
+        f"ORDER BY created_at DESC, id DESC LIMIT 20 OFFSET :depth"
+    )
+    timings = []
+    with engine.connect() as conn:
+        for _ in range(REPEAT):
+            started = time.perf_counter()
+            conn.execute(sql, {"league": league, "depth": depth}).all()
+            timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+async def main(rows: int) -> None:
+    seed(rows)
+    os.environ["RESPONSE_CACHE_MAX_ENTRIES"] = "0"
+
+    import httpx
+    from sqlalchemy import select
+
+    from app import _encode_cursor, app
+    from database import engine
+    from models import Article
+
+    cases = (
+        ("/articles", None, (0, 1000, 10000, 100000, rows // 2)),
+        ("/articles/by-league/league-3", "league-3", (0, 1000, 10000, rows // 25)),
+    )
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path, league, depths in cases:
+            print(path)
+            print(f"{'depth':>10} {'offset':>10} {'keyset':>10} {'no index':>10}")
+            for depth in depths:
+                offset_ms = await _median_ms(client, f"{path}?limit=20&offset={depth}")
+
+                keyset_ms = await _median_ms(client, f"{path}?limit=20")
+                if depth:
+                    query = select(Article.id, Article.created_at)
+                    if league:
+                        query = query.where(Article.league == league)
+                    with engine.connect() as conn:
+                        before = conn.execute(
+                            query.order_by(Article.created_at.desc(), Article.id.desc())
+                            .offset(depth - 1)
+                            .limit(1)
+                        ).one()
+                    cursor = _encode_cursor(before)
+                    keyset_ms = await _median_ms(client, f"{path}?limit=20&after={cursor}")
+
+                print(
+                    f"{depth:>10} {offset_ms:>8.1f}ms {keyset_ms:>8.1f}ms "
+                    f"{_unindexed_ms(engine, league, depth):>8.1f}ms"
+                )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000))
@@ -0,0 +1,129 @@
+"""
+bot/pipeline.run_pipeline run time vs. archive size.
+
+    python benchmarks/pipeline_run.py [ROWS ...]      # default 10000 100000 1000000
+
+Each size runs in its own process on a seeded database (benchmarks/seed.py).
+A run gets 20 fetched items: 10 already stored, 10 new whose titles
+collide with stored slugs. Fetching and AI rewrite are stubbed, so only
+the pipeline's own DB work is timed. "full scan" is what the old code
+did on every run: load every external_id and slug into Python sets.
+
+Results (SQLite, median of 7 runs; memory = tracemalloc peak):
+
+        rows   pipeline   peak mem   full scan   peak mem
+       10000      9.5ms      0.1MB      66.7ms      2.8MB
+      100000      8.4ms      0.1MB     473.7ms     26.4MB
+     1000000     11.4ms      0.1MB    5913.1ms    252.2MB
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from seed import article_row, seed
+
+RUNS = 7
+
+
+def _timed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def _peak_memory(fn) -> int:
+    # posebno od merenja vremena: tracemalloc usporava alokacije
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def run_one(rows: int) -> dict:
+    seed(rows)
+
+    from sqlalchemy import delete
+
+    from bot import pipeline
+    from database import SessionLocal
+    from models import Article
+
+    batch = []
+
+    def fetched(max_per_league=3, hard_limit=20):
+        return batch
+
+    pipeline.fetch_all_sports_headlines = fetched
+    pipeline.rewrite_to_long_form = lambda title, raw_text: raw_text
+
+    def full_scan():
+        db = SessionLocal()
+        try:
+            set(x for (x,) in db.query(Article.external_id).all())
+            set(x for (x,) in db.query(Article.slug).all())
+        finally:
+            db.close()
+
+    def next_batch(run):
+        batch[:] = []
+        for n in range(10):
+            stored = article_row((run * 7919 + n * 104729) % rows)
+            new = article_row(rows - 1 - (run * 10 + n))
+            new_url = f"https://bench.example/new/{run}-{n}"
+            for item, url in ((stored, stored["external_id"]), (new, new_url)):
+                batch.append({"url": url, "title": item["title"], "description": item["summary"]})
+
+    timings = []
+    try:
+        for run in range(RUNS):
+            next_batch(run)
+            timings.append(_timed(pipeline.run_pipeline))
+        next_batch(RUNS)
+        pipeline_peak = _peak_memory(pipeline.run_pipeline)
+
+        scans = [_timed(full_scan) for _ in range(3)]
+        scan_peak = _peak_memory(full_scan)
+    finally:
+        db = SessionLocal()
+        inserted = db.execute(
+            delete(Article).where(Article.external_id.like("https://bench.example/new/%"))
+        ).rowcount
+        db.commit()
+        db.close()
+    assert inserted == 10 * (RUNS + 1), inserted
+
+    return {
+        "rows": rows,
+        "pipeline_ms": statistics.median(timings) * 1000,
+        "pipeline_peak_mb": pipeline_peak / 1e6,
+        "scan_ms": statistics.median(scans) * 1000,
+        "scan_peak_mb": scan_peak / 1e6,
+    }
+
+
+def main(sizes) -> None:
+    print(f"{'rows':>12} {'pipeline':>10} {'peak mem':>10} {'full scan':>11} {'peak mem':>10}")
+    for rows in sizes:
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--one", str(rows)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        print(
+            f"{r['rows']:>12} {r['pipeline_ms']:>8.1f}ms {r['pipeline_peak_mb']:>8.1f}MB "
+            f"{r['scan_ms']:>9.1f}ms {r['scan_peak_mb']:>8.1f}MB"
+        )
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--one"]:
+        print(json.dumps(run_one(int(sys.argv[2]))))
+    else:
+        main([int(a) for a in sys.argv[1:]] or [10000, 100000, 1000000])
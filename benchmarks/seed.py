@@ -0,0 +1,104 @@
+"""
+Seeded SQLite databases for the benchmarks in this directory.
+
+    python benchmarks/seed.py 1000000
+
+Builds (or reuses) BENCH_DIR/articles-<rows>.db with the current schema
+and `rows` synthetic articles: 3 sports, 20 leagues, 10 countries, one
+article per minute going back from 2026-01-01, ~300 character summaries.
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BENCH_DIR = os.getenv("BENCH_DIR", os.path.join(ROOT, ".bench"))
+
+SPORTS = ("football", "basketball", "tennis")
+LEAGUES = tuple(f"league-{i}" for i in range(20))
+COUNTRIES = tuple(f"country-{i}" for i in range(10))
+NEWEST = datetime(2026, 1, 1)
+
+_SUMMARY = (
+    "Late goal settles a tense derby as the home side climbs to second place "
+    "after a week of injuries, suspensions and questions about the manager's "
+    "future. Supporters stayed long after the final whistle, and the squad "
+    "now faces three away games in eight days before the international break."
+)
+
+_CHUNK = 20000
+
+
+def database_path(rows: int) -> str:
+    return os.path.join(BENCH_DIR, f"articles-{rows}.db")
+
+
+def use_database(rows: int) -> str:
+    """
+    Point DATABASE_URL at the benchmark database for `rows` articles.
+    Must run before database.py is imported.
+    """
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    url = f"sqlite:///{database_path(rows)}"
+    os.environ["DATABASE_URL"] = url
+    os.environ.setdefault("OPENAI_API_KEY", "")
+    return url
+
+
+def article_row(i: int) -> dict:
+    return {
+        "external_id": f"https://bench.example/news/{i}",
+        "title": f"Story {i}: derby decided late",
+        "slug": f"story-{i}-derby-decided-late",
+        "sport": SPORTS[i % len(SPORTS)],
+        "league": LEAGUES[i % len(LEAGUES)],
+        "country": COUNTRIES[i % len(COUNTRIES)],
+        "division": 1,
+        "image_url": None,
+        "source_url": f"https://bench.example/news/{i}",
+        "summary": _SUMMARY,
+        "content": None,
+        "ai_content": None,
+        "ai_generated": False,
+        "is_live": True,
+        "created_at": NEWEST - timedelta(minutes=i),
+    }
+
+
+def seed(rows: int) -> str:
+    """
+    Create the database for `rows` articles unless it already exists.
+    Returns its URL.
+    """
+    url = use_database(rows)
+
+    from sqlalchemy import func, insert, select
+
+    from database import engine
+    from migrations import run_migrations
+    from models import Article
+
+    run_migrations()
+    with engine.connect() as conn:
+        existing = conn.execute(select(func.count()).select_from(Article)).scalar()
+    if existing == rows:
+        return url
+    if existing:
+        raise SystemExit(f"{database_path(rows)} has {existing} articles, expected {rows}; delete it")
+
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        for start in range(0, rows, _CHUNK):
+            conn.execute(
+                insert(Article),
+                [article_row(i) for i in range(start, min(start + _CHUNK, rows))],
+            )
+    print(f"seeded {rows} articles in {time.perf_counter() - started:.0f}s -> {database_path(rows)}")
+    return url
+
+
+if __name__ == "__main__":
+    seed(int(sys.argv[1]))
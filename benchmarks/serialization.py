@@ -0,0 +1,83 @@
+"""
+Serialization of one limit=100 /articles page: before vs. after orjson.
+
+    python benchmarks/serialization.py
+
+"before" is what FastAPI did for a response_model=List[ArticleOut]
+endpoint: validate every row with Pydantic, jsonable_encoder, then
+json.dumps (JSONResponse). "after" is serialization.dumps_json on the
+row dicts, as app.py does now. The rows have ~800 character summaries.
+
+Results (best of 5 x 200 loops, per page):
+
+  before (ArticleOut + jsonable_encoder + json.dumps)   4.56ms
+  after  (dumps_json, orjson)                           0.09ms
+"""
+import json
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("OPENAI_API_KEY", "")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from app import ArticleOut  # noqa: E402
+from serialization import dumps_json  # noqa: E402
+
+LOOPS = 200
+
+
+def page(limit: int = 100) -> List[dict]:
+    newest = datetime(2026, 1, 1)
+    summary = ("Late goal settles a tense derby between two title rivals. " * 14)[:800]
+    return [
+        {
+            "id": i,
+            "title": f"Story {i}: derby decided late",
+            "slug": f"story-{i}-derby-decided-late",
+            "sport": "football",
+            "league": "premier-league",
+            "country": "england",
+            "division": 1,
+            "image_url": f"https://img.example/{i}.jpg",
+            "source_url": f"https://news.example/{i}",
+            "summary": summary,
+            "created_at": newest - timedelta(minutes=i),
+        }
+        for i in range(limit)
+    ]
+
+
+_validator = TypeAdapter(List[ArticleOut])
+
+
+def before(rows) -> bytes:
+    content = jsonable_encoder(_validator.validate_python(rows))
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def after(rows) -> bytes:
+    return dumps_json(rows)
+
+
+def main() -> None:
+    rows = page()
+    assert json.loads(before(rows)) == json.loads(after(rows))
+    for name, fn in (
+        ("before (ArticleOut + jsonable_encoder + json.dumps)", before),
+        ("after  (dumps_json, orjson)", after),
+    ):
+        best = min(timeit.repeat(lambda: fn(rows), number=LOOPS, repeat=5)) / LOOPS
+        print(f"  {name:<54}{best * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from models import Budget
+
+logger = logging.getLogger(__name__)
+
+# Budžet AI rewrite-ova po intervalu, zajednički za sve rewrite worker-e
+# (queue mod). Stanje je jedan red u budgets; menja se compare-and-set
+# UPDATE-om (WHERE used = staro), pa je atomsko i na Postgres-u i na SQLite-u.
+
+AI_BUDGET = "ai-rewrite"
+
+# isti limit i interval kao inline pipeline (bot/scheduler.py)
+AI_BUDGET_LIMIT = int(os.getenv("NEWS_MAX_AI_ARTICLES", "100"))
+AI_BUDGET_WINDOW_SECONDS = int(os.getenv("NEWS_FETCH_INTERVAL_MINUTES", "10")) * 60
+
+_CAS_ATTEMPTS = 10
+
+
+def _seed(db: Session, name: str, now: datetime) -> None:
+    values = {"name": name, "window_start": now, "used": 0}
+    if db.get_bind().dialect.name == "postgresql":
+        stmt = pg_insert(Budget).values(values).on_conflict_do_nothing()
+    else:
+        stmt = insert(Budget).values(values).prefix_with("OR IGNORE")
+    db.execute(stmt)
+
+
+def _compare_and_set(db: Session, name: str, row, used: int, window_start: datetime) -> bool:
+    result = db.execute(
+        update(Budget)
+        .where(
+            Budget.name == name,
+            Budget.used == row.used,
+            Budget.window_start == row.window_start,
+        )
+        .values(used=used, window_start=window_start)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def reserve_budget(
+    db: Session,
+    wanted: int,
+    name: str = AI_BUDGET,
+    limit: Optional[int] = None,
+    window_seconds: Optional[int] = None,
+) -> Tuple[int, Optional[datetime]]:
+    """
+    Take up to `wanted` units from the shared budget of the current window
+    (a new window starts `window_seconds` after the previous one).
+    Returns (granted, window_start); hand unused units back with
+    refund_budget. Commits.
+    """
+    limit = AI_BUDGET_LIMIT if limit is None else limit
+    window_seconds = AI_BUDGET_WINDOW_SECONDS if window_seconds is None else window_seconds
+    if wanted <= 0:
+        return 0, None
+
+    try:
+        _seed(db, name, datetime.utcnow())
+        db.commit()
+        for _ in range(_CAS_ATTEMPTS):
+            now = datetime.utcnow()
+            row = db.execute(
+                select(Budget.used, Budget.window_start).where(Budget.name == name)
+            ).one()
+            used, window_start = row.used, row.window_start
+            if now - window_start >= timedelta(seconds=window_seconds):
+                used, window_start = 0, now
+
+            granted = max(0, min(wanted, limit - used))
+            if granted == 0 and window_start == row.window_start:
+                db.rollback()
+                return 0, window_start
+            if _compare_and_set(db, name, row, used + granted, window_start):
+                return granted, window_start
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[ai_budget] Could not reserve {name}: {e}")
+        return 0, None
+
+    # stalno nas neko pretekne -> sledeći put
+    logger.warning(f"[ai_budget] Could not reserve {name}: too much contention")
+    return 0, None
+
+
+def refund_budget(db: Session, amount: int, window_start: Optional[datetime], name: str = AI_BUDGET) -> None:
+    """
+    Give back unused units of a reservation (only within the same window).
+    Commits.
+    """
+    if amount <= 0 or window_start is None:
+        return
+    try:
+        for _ in range(_CAS_ATTEMPTS):
+            row = db.execute(
+                select(Budget.used, Budget.window_start).where(Budget.name == name)
+            ).one()
+            if row.window_start != window_start:
+                db.rollback()
+                return
+            if _compare_and_set(db, name, row, max(0, row.used - amount), window_start):
+                return
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[ai_budget] Could not refund {name}: {e}")
@@ -0,0 +1,310 @@
+# bot/batch_rewrite.py
+#
+# Backlog AI rewrite preko OpenAI Batch API-ja.
+# Umesto da stare (ai_generated == False) članke prepisujemo jedan po jedan
+# u live ciklusu, pravimo JSONL fajl sa promptovima, šaljemo ga na batch
+# endpoint i u sledećim tick-ovima proveravamo da li je gotov. Rezultati se
+# upisuju u bazu odjednom (ai_content / title / slug).
+
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import AIBatchJob, Article
+from .fetch_sources import _apply_ai_batch, _prepare_ai_input
+from .rewrite_ai import (
+    OPENAI_API_KEY,
+    OPENAI_BASE_URL,
+    OPENAI_MODEL,
+    build_chat_payload,
+    build_rewrite_prompt,
+    get_http_client,
+    openai_headers,
+    rewrite_cache_key,
+)
+from .rewrite_cache import get_cached_rewrites, store_rewrite
+from .work_queue import REWRITE, queued_keys
+
+logger = logging.getLogger(__name__)
+
+# koliko članaka ide u jedan batch i koliko batch-eva sme da čeka
+AI_BATCH_SIZE = int(os.getenv("NEWS_AI_BATCH_SIZE", "500"))
+AI_BATCH_MAX_PENDING = int(os.getenv("NEWS_AI_BATCH_MAX_PENDING", "3"))
+
+AI_BATCH_DIR = os.getenv("NEWS_AI_BATCH_DIR", tempfile.gettempdir())
+AI_BATCH_COMPLETION_WINDOW = "24h"
+
+_PENDING_STATUSES = ("validating", "in_progress", "finalizing", "cancelling")
+
+# statusi posle kojih ima (bar delimičnog) output fajla
+_FINISHED_WITH_OUTPUT = ("completed", "expired")
+
+
+# ================== BATCH API CALLS ==================
+
+def _upload_batch_file(path: str) -> str:
+    with open(path, "rb") as f:
+        resp = get_http_client().post(
+            f"{OPENAI_BASE_URL}/files",
+            headers=openai_headers(),
+            data={"purpose": "batch"},
+            files={"file": (os.path.basename(path), f, "application/jsonl")},
+        )
+    resp.raise_for_status()
+    return resp.json()["id"]
+
+
+def _create_batch(input_file_id: str) -> Dict:
+    resp = get_http_client().post(
+        f"{OPENAI_BASE_URL}/batches",
+        headers=openai_headers(),
+        json={
+            "input_file_id": input_file_id,
+            "endpoint": "/v1/chat/completions",
+            "completion_window": AI_BATCH_COMPLETION_WINDOW,
+        },
+    )
+    resp.raise_for_status()
+    return resp.json()
+
+
+def _get_batch(batch_id: str) -> Dict:
+    resp = get_http_client().get(
+        f"{OPENAI_BASE_URL}/batches/{batch_id}",
+        headers=openai_headers(),
+    )
+    resp.raise_for_status()
+    return resp.json()
+
+
+def _download_file(file_id: str) -> str:
+    resp = get_http_client().get(
+        f"{OPENAI_BASE_URL}/files/{file_id}/content",
+        headers=openai_headers(),
+    )
+    resp.raise_for_status()
+    return resp.text
+
+
+# ================== SUBMIT ==================
+
+def _pending_article_ids(db: Session) -> set:
+    ids = set()
+    for job in db.query(AIBatchJob).filter(AIBatchJob.status.in_(_PENDING_STATUSES)).all():
+        ids.update(article_id for article_id, _ in json.loads(job.items or "[]"))
+    return ids
+
+
+def _write_batch_file(lines: List[Dict]) -> str:
+    fd, path = tempfile.mkstemp(prefix="ai_batch_", suffix=".jsonl", dir=AI_BATCH_DIR)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+    return path
+
+
+def submit_backlog_batch(db: Session, max_ai_chars: int) -> int:
+    """
+    Build a JSONL file for the next backlog articles (not already in a
+    pending batch) and submit it. Articles whose prompt is already in the
+    rewrite cache are applied right away instead.
+    Returns number of articles handled (submitted + applied from cache).
+    """
+    pending_count = (
+        db.query(AIBatchJob).filter(AIBatchJob.status.in_(_PENDING_STATUSES)).count()
+    )
+    if pending_count >= AI_BATCH_MAX_PENDING:
+        logger.info(f"[batch_rewrite] {pending_count} batches still pending, not submitting")
+        return 0
+
+    q = (
+        db.query(Article)
+        .filter(Article.is_live == True)
+        .filter(Article.ai_generated == False)
+        .filter(Article.ai_content.is_(None))
+    )
+    # bez članaka koji su u batch-u ili čekaju u rewrite redu (queue mod)
+    in_flight = _pending_article_ids(db) | {int(k) for k in queued_keys(db, REWRITE)}
+    if in_flight:
+        q = q.filter(Article.id.notin_(in_flight))
+    articles = q.order_by(Article.created_at.desc()).limit(AI_BATCH_SIZE).all()
+
+    prepared: List[Tuple[Article, Dict, str]] = []
+    for article in articles:
+        ai_input = _prepare_ai_input(article, max_ai_chars)
+        if ai_input:
+            prepared.append((article, ai_input, rewrite_cache_key(**ai_input)))
+
+    if not prepared:
+        return 0
+
+    cached = get_cached_rewrites([key for _, _, key in prepared])
+    from_cache = [(article, cached[key]) for article, _, key in prepared if key in cached]
+    applied = _apply_ai_batch(db, from_cache)
+
+    lines = []
+    items = []
+    for article, ai_input, key in prepared:
+        if key in cached:
+            continue
+        prompt = build_rewrite_prompt(
+            ai_input["title"].strip(),
+            ai_input["raw_text"].strip(),
+            ai_input["sport"],
+        )
+        lines.append(
+            {
+                "custom_id": f"article-{article.id}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": build_chat_payload(prompt),
+            }
+        )
+        items.append([article.id, key])
+
+    if not lines:
+        return applied
+
+    path = _write_batch_file(lines)
+    try:
+        input_file_id = _upload_batch_file(path)
+        batch = _create_batch(input_file_id)
+    except Exception as e:
+        logger.error(f"[batch_rewrite] Batch submit failed: {e}")
+        return applied
+    finally:
+        os.remove(path)
+
+    db.add(
+        AIBatchJob(
+            batch_id=batch["id"],
+            status=batch.get("status", "validating"),
+            input_file_id=input_file_id,
+            items=json.dumps(items),
+        )
+    )
+    db.commit()
+
+    logger.info(
+        f"[batch_rewrite] Submitted batch {batch['id']} with {len(lines)} articles "
+        f"({applied} applied from cache)"
+    )
+    return len(lines) + applied
+
+
+# ================== POLL + APPLY ==================
+
+def _parse_output_file(content: str) -> Dict[str, str]:
+    """
+    {custom_id: model output} for successful lines of a batch output file.
+    """
+    outputs: Dict[str, str] = {}
+    for raw in content.splitlines():
+        if not raw.strip():
+            continue
+        try:
+            line = json.loads(raw)
+            response = line.get("response") or {}
+            if response.get("status_code") != 200:
+                continue
+            text = response["body"]["choices"][0]["message"]["content"]
+        except Exception as e:
+            logger.warning(f"[batch_rewrite] Bad output line: {e}")
+            continue
+        if text and text.strip():
+            outputs[line["custom_id"]] = text.strip()
+    return outputs
+
+
+def _apply_batch_output(db: Session, job: AIBatchJob, content: str) -> int:
+    outputs = _parse_output_file(content)
+    items = json.loads(job.items or "[]")
+
+    by_id: Dict[int, Tuple[str, str]] = {}
+    for article_id, key in items:
+        output = outputs.get(f"article-{article_id}")
+        if output:
+            by_id[article_id] = (output, key)
+
+    if not by_id:
+        return 0
+
+    articles = db.query(Article).filter(Article.id.in_(list(by_id))).all()
+
+    results = []
+    for article in articles:
+        output, key = by_id[article.id]
+        store_rewrite(key, OPENAI_MODEL, output)
+        # live put ga je možda već prepisao u međuvremenu
+        if not article.ai_generated:
+            results.append((article, output))
+
+    return _apply_ai_batch(db, results)
+
+
+def poll_backlog_batches(db: Session) -> int:
+    """
+    Check all pending batches; apply finished ones in bulk.
+    Returns number of rewritten articles.
+    """
+    applied = 0
+    jobs = db.query(AIBatchJob).filter(AIBatchJob.status.in_(_PENDING_STATUSES)).all()
+
+    for job in jobs:
+        try:
+            batch = _get_batch(job.batch_id)
+        except Exception as e:
+            logger.error(f"[batch_rewrite] Could not poll batch {job.batch_id}: {e}")
+            continue
+
+        status = batch.get("status") or job.status
+        job.output_file_id = batch.get("output_file_id") or job.output_file_id
+
+        if status in _PENDING_STATUSES:
+            job.status = status
+            db.commit()
+            continue
+
+        if status in _FINISHED_WITH_OUTPUT and job.output_file_id:
+            try:
+                content = _download_file(job.output_file_id)
+            except Exception as e:
+                logger.error(f"[batch_rewrite] Could not download output of {job.batch_id}: {e}")
+                continue
+
+            done = _apply_batch_output(db, job, content)
+            applied += done
+            status = "applied"
+            logger.info(f"[batch_rewrite] Applied {done} rewrites from batch {job.batch_id}")
+        else:
+            logger.warning(f"[batch_rewrite] Batch {job.batch_id} ended with status={status}")
+
+        # članci koji nisu dobili rezultat ulaze u sledeći batch
+        job.status = status
+        job.finished_at = datetime.utcnow()
+        db.commit()
+
+    return applied
+
+
+def run_backlog_batches(max_ai_chars: int = 3000) -> int:
+    """
+    One scheduler tick of batch mode: apply finished batches, then submit
+    the next one. Returns number of articles rewritten in this tick.
+    """
+    if not OPENAI_API_KEY:
+        return 0
+
+    db = SessionLocal()
+    try:
+        applied = poll_backlog_batches(db)
+        submit_backlog_batch(db, max_ai_chars)
+        return applied
+    finally:
+        db.close()
@@ -0,0 +1,492 @@
+import logging
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+import feedparser
+import httpx
+from sqlalchemy.orm import Session
+
+from models import FeedState
+from .leases import claim_due_feeds
+from .poll_schedule import parse_skip_hours, update_schedule
+from .seen_entries import SeenEntries
+from .stream_parser import NotAFeed, StreamingFeedParser, entry_key
+
+logger = logging.getLogger(__name__)
+
+# Koliko feed-ova skidamo paralelno (ukupno)
+FEED_WORKERS = int(os.getenv("NEWS_FEED_WORKERS", "16"))
+
+# Max paralelnih zahteva ka istom hostu (da ne "udaramo" jedan sajt)
+FEED_PER_HOST_LIMIT = int(os.getenv("NEWS_FEED_PER_HOST_LIMIT", "2"))
+
+# Timeout po feed-u (sekunde)
+FEED_CONNECT_TIMEOUT = float(os.getenv("NEWS_FEED_CONNECT_TIMEOUT", "5"))
+FEED_TIMEOUT = float(os.getenv("NEWS_FEED_TIMEOUT", "15"))
+
+# inkrementalno parsiranje sa ranim prekidom (bot/stream_parser.py)
+FEED_STREAMING = os.getenv("NEWS_FEED_STREAMING", "1") == "1"
+
+FEED_USER_AGENT = os.getenv(
+    "NEWS_FEED_USER_AGENT",
+    "Mozilla/5.0 (compatible; AllBallSportsBot/1.0)",
+)
+
+
+class _HostLimiter:
+    """
+    One semaphore per host, created lazily.
+    """
+
+    def __init__(self, per_host: int):
+        self._per_host = max(1, per_host)
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.Semaphore] = {}
+
+    def get(self, url: str) -> threading.Semaphore:
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            sem = self._semaphores.get(host)
+            if sem is None:
+                sem = threading.Semaphore(self._per_host)
+                self._semaphores[host] = sem
+            return sem
+
+
+class FeedDeadlineExceeded(Exception):
+    pass
+
+
+def _iter_body(resp: httpx.Response, deadline: float) -> Iterator[bytes]:
+    # httpx read timeout važi po chunk-u; host koji šalje bajt po bajt bi
+    # inače držao worker (i ceo ciklus) koliko god hoće
+    for chunk in resp.iter_bytes():
+        yield chunk
+        if time.monotonic() > deadline:
+            raise FeedDeadlineExceeded(f"body not received within {FEED_TIMEOUT:.0f}s")
+
+
+def _parse_stream(
+    resp: httpx.Response,
+    limit: Optional[int],
+    stop_at: Optional[str],
+    deadline: float,
+):
+    """
+    Parse the response body while it downloads and stop reading once the
+    streaming parser has enough entries. Falls back to feedparser on the
+    whole document if it isn't plain RSS/Atom XML.
+    Raises FeedDeadlineExceeded if the body takes longer than `deadline`.
+    Returns (feed, bytes read, complete).
+    """
+    buffer = bytearray()
+    chunks = _iter_body(resp, deadline)
+    parser = StreamingFeedParser(limit=limit, stop_at=stop_at)
+    try:
+        for chunk in chunks:
+            buffer += chunk
+            parser.feed(chunk)
+            if parser.done:
+                # ostatak dokumenta ne čitamo (konekcija se zatvara)
+                return parser.close(), len(buffer), False
+        return parser.close(), len(buffer), True
+    except (ET.ParseError, NotAFeed) as e:
+        logger.info(f"[feed_fetcher] Streaming parse failed for {resp.url} ({e}), using feedparser")
+
+    # ostatak dokumenta (body se može pročitati samo jednom)
+    for chunk in chunks:
+        buffer += chunk
+    feed = feedparser.parse(
+        bytes(buffer),
+        response_headers={k.lower(): v for k, v in resp.headers.items()},
+    )
+    feed.feed["skip_hours"] = parse_skip_hours(bytes(buffer))
+    return feed, len(buffer), True
+
+
+def _download_and_parse(
+    client: httpx.Client,
+    limiter: _HostLimiter,
+    url: str,
+    validators: Optional[Dict[str, str]] = None,
+    limit: Optional[int] = None,
+    stop_at: Optional[str] = None,
+) -> Dict:
+    """
+    Download one feed (respecting per-host limit) and parse the bytes.
+
+    `validators` can hold "etag" / "last_modified" from the previous run;
+    they are sent as If-None-Match / If-Modified-Since and a 304 answer
+    skips parsing entirely.
+
+    With FEED_STREAMING the body is parsed while it downloads and reading
+    stops after `limit` entries or at the entry with key `stop_at` (newest
+    stored entry, see StreamingFeedParser), so work scales with new entries.
+
+    Returns dict: feed (parsed or None), bytes, status, etag, last_modified,
+    ttl / skip_hours (RSS hints), complete (whole document was read).
+    status 0 = network error.
+    """
+    result = {
+        "feed": None,
+        "bytes": 0,
+        "status": 0,
+        "etag": None,
+        "last_modified": None,
+        "ttl": None,
+        "skip_hours": None,
+        "complete": True,
+    }
+
+    headers = {}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+    started = time.monotonic()
+    try:
+        with limiter.get(url):
+            # rok za ceo feed (zaglavlja + body), računa se od kad imamo slot
+            deadline = time.monotonic() + FEED_TIMEOUT
+            with client.stream("GET", url, headers=headers) as resp:
+                result["status"] = resp.status_code
+
+                if resp.status_code == 304:
+                    logger.info(f"[feed_fetcher] Not modified: {url}")
+                    return result
+
+                if resp.status_code >= 400:
+                    logger.error(f"[feed_fetcher] HTTP {resp.status_code} for {url}")
+                    return result
+
+                result["etag"] = resp.headers.get("etag")
+                result["last_modified"] = resp.headers.get("last-modified")
+
+                if FEED_STREAMING:
+                    feed, size, complete = _parse_stream(resp, limit, stop_at, deadline)
+                else:
+                    content = b"".join(_iter_body(resp, deadline))
+                    # feedparser dobija bytes, ne URL – ne radi sopstveni (blokirajući) download
+                    feed = feedparser.parse(
+                        content,
+                        response_headers={k.lower(): v for k, v in resp.headers.items()},
+                    )
+                    size, complete = len(content), True
+                    result["skip_hours"] = parse_skip_hours(content)
+    except Exception as e:
+        logger.error(f"[feed_fetcher] Download failed for {url}: {e}")
+        result["status"] = 0
+        return result
+
+    elapsed = time.monotonic() - started
+    logger.info(
+        f"[feed_fetcher] Downloaded {url} "
+        f"({size} bytes{'' if complete else ', stopped early'}, {elapsed:.2f}s)"
+    )
+
+    result["feed"] = feed
+    result["bytes"] = size
+    result["complete"] = complete
+
+    ttl = feed.feed.get("ttl")
+    if ttl and str(ttl).strip().isdigit():
+        result["ttl"] = int(ttl)
+    if feed.feed.get("skip_hours"):
+        result["skip_hours"] = feed.feed["skip_hours"]
+    return result
+
+
+def fetch_feeds(
+    urls: Iterable[str],
+    validators: Optional[Dict[str, Dict[str, str]]] = None,
+    limits: Optional[Dict[str, Optional[int]]] = None,
+    stop_at: Optional[Dict[str, str]] = None,
+) -> List[Dict]:
+    """
+    Download and parse all given feeds concurrently.
+    Result list is aligned with input order (see _download_and_parse).
+    Wall-clock time is roughly the slowest feed, not the sum of all.
+    `limits` / `stop_at` are per-URL early-stop hints for the parser.
+    """
+    urls = list(urls)
+    if not urls:
+        return []
+
+    validators = validators or {}
+    limits = limits or {}
+    stop_at = stop_at or {}
+    limiter = _HostLimiter(FEED_PER_HOST_LIMIT)
+    timeout = httpx.Timeout(FEED_TIMEOUT, connect=FEED_CONNECT_TIMEOUT)
+    workers = max(1, min(FEED_WORKERS, len(urls)))
+
+    started = time.monotonic()
+    with httpx.Client(
+        timeout=timeout,
+        follow_redirects=True,
+        headers={"User-Agent": FEED_USER_AGENT},
+        limits=httpx.Limits(max_connections=workers),
+    ) as client:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="feed") as pool:
+            results = list(
+                pool.map(
+                    lambda u: _download_and_parse(
+                        client, limiter, u, validators.get(u), limits.get(u), stop_at.get(u)
+                    ),
+                    urls,
+                )
+            )
+
+    logger.info(
+        f"[feed_fetcher] Fetched {len(urls)} feeds in "
+        f"{time.monotonic() - started:.2f}s ({workers} workers)"
+    )
+    return results
+
+
+def _load_feed_states(db: Session, urls: List[str]) -> Dict[str, FeedState]:
+    if not urls:
+        return {}
+    rows = db.query(FeedState).filter(FeedState.url.in_(urls)).all()
+    return {row.url: row for row in rows}
+
+
+def _save_feed_states(
+    db: Session,
+    states: Dict[str, FeedState],
+    results: Dict[str, Dict],
+) -> None:
+    """
+    Persist validators, last status and the next poll time for every
+    fetched URL.
+    """
+    now = datetime.utcnow()
+    for url, res in results.items():
+        state = states.get(url)
+        if state is None:
+            state = FeedState(url=url)
+            db.add(state)
+
+        state.last_status = res["status"]
+        state.last_fetched_at = now
+
+        # validatore menjamo samo kad smo dobili novi dokument
+        if res["feed"] is not None:
+            state.etag = res["etag"]
+            state.last_modified = res["last_modified"]
+
+        update_schedule(state, res, now)
+        state.locked_by = None
+        state.locked_until = None
+
+    db.commit()
+
+
+class FeedCache:
+    """
+    Run-scoped feed cache keyed by URL.
+
+    Many leagues share the same feed (COMMON_FOOTBALL_FEEDS, ESPN, ...).
+    Every distinct URL is downloaded and parsed once per cycle and the
+    parsed result is handed to every league that references it.
+
+    If a DB session is given, conditional GET is used: ETag/Last-Modified
+    are read from feed_state before fetching and stored after. Unchanged
+    feeds (304) are not parsed and yield no entries.
+
+    With `due_only` (needs `db`) only feeds that are due and not locked by
+    another worker are requested (bot/leases.py); the rest yield no entries.
+
+    With `db`, entries processed in earlier cycles are remembered per feed
+    (bot/seen_entries.py): is_seen() filters them before any DB lookup,
+    mark_seen() + save_seen() record the new ones after they are stored.
+    """
+
+    def __init__(self, db: Optional[Session] = None, due_only: bool = False):
+        self._db = db
+        self._due_only = due_only and db is not None
+        self._not_due = 0
+        self._feeds: Dict[str, Optional[feedparser.FeedParserDict]] = {}
+        self._sizes: Dict[str, int] = {}
+        self._refs: Counter = Counter()
+        self._not_modified = 0
+        self._seen: Dict[str, SeenEntries] = {}
+        self._pending_seen: Dict[str, List[Tuple[Dict, Optional[str]]]] = defaultdict(list)
+        self._skipped_seen = 0
+        # key najnovijeg entry-ja po feed-u i feed-ovi čije entry-je je neko čitao
+        self._newest: Dict[str, str] = {}
+        self._read: Set[str] = set()
+
+    def prefetch(
+        self,
+        urls: Iterable[str],
+        limits: Optional[Dict[str, Optional[int]]] = None,
+    ) -> None:
+        """
+        Register URL references (duplicates allowed) and fetch every
+        distinct URL not already in the cache.
+
+        `limits` = max entries anyone needs per URL (None = all); the
+        parser stops there, and with `db` also at the newest entry stored
+        in an earlier cycle (see save_seen).
+        """
+        urls = list(urls)
+        self._refs.update(urls)
+
+        missing = [u for u in dict.fromkeys(urls) if u not in self._feeds]
+        if not missing:
+            return
+
+        if self._due_only:
+            # samo feed-ovi kojima je došao red i koje nije uzeo drugi worker
+            claimed = set(claim_due_feeds(self._db, missing))
+            for url in missing:
+                if url not in claimed:
+                    self._feeds[url] = None
+                    self._not_due += 1
+            missing = [u for u in missing if u in claimed]
+            if not missing:
+                return
+
+        states: Dict[str, FeedState] = {}
+        validators: Dict[str, Dict[str, str]] = {}
+        stop_at: Dict[str, str] = {}
+        if self._db is not None:
+            states = _load_feed_states(self._db, missing)
+            validators = {
+                url: {"etag": st.etag, "last_modified": st.last_modified}
+                for url, st in states.items()
+            }
+            stop_at = {url: st.last_entry_id for url, st in states.items() if st.last_entry_id}
+            for url, st in states.items():
+                self._seen[url] = SeenEntries(st.seen_entries, st.seen_before)
+
+        results = dict(zip(missing, fetch_feeds(missing, validators, limits, stop_at)))
+        for url, res in results.items():
+            self._feeds[url] = res["feed"]
+            self._sizes[url] = res["bytes"]
+            if res["feed"] is not None and res["feed"].entries:
+                key = entry_key(res["feed"].entries[0])
+                if key:
+                    self._newest[url] = key[:500]
+            if res["status"] == 304:
+                self._not_modified += 1
+
+        if self._db is not None:
+            try:
+                _save_feed_states(self._db, states, results)
+            except Exception as e:
+                self._db.rollback()
+                logger.error(f"[feed_fetcher] Could not save feed_state: {e}")
+
+    def get(self, url: str) -> Optional[feedparser.FeedParserDict]:
+        if url not in self._feeds:
+            self.prefetch([url])
+        return self._feeds.get(url)
+
+    def is_seen(self, url: str, entry) -> bool:
+        """
+        True if `entry` of feed `url` was already processed in an earlier cycle.
+        """
+        self._read.add(url)
+        seen = self._seen.get(url)
+        if seen is None or entry not in seen:
+            return False
+        self._skipped_seen += 1
+        return True
+
+    def mark_seen(self, url: str, entry, item_url: Optional[str] = None) -> None:
+        """
+        Queue `entry` to be remembered by save_seen(). `item_url` is the
+        article URL it produced (None = entry is skipped for good).
+        """
+        if self._db is not None:
+            self._pending_seen[url].append((entry, item_url))
+
+    def save_seen(self, stored: Optional[Set[str]] = None) -> None:
+        """
+        Persist marked entries into feed_state. With `stored`, entries whose
+        article URL is not in it (e.g. failed insert) are left for next cycle.
+
+        Also moves last_entry_id (where the next poll stops parsing) to the
+        newest entry, but only for feeds with nothing left for next cycle –
+        otherwise the parser would stop before the unstored entries. Feeds
+        with unstored entries lose their ETag/Last-Modified, so the next
+        poll gets the full document instead of a 304.
+        """
+        if self._db is None or not (self._pending_seen or self._read):
+            return
+
+        states = _load_feed_states(self._db, list(set(self._pending_seen) | self._read))
+        held_back: Set[str] = set()
+        for url, marks in self._pending_seen.items():
+            state = states.get(url)
+            entries = []
+            for entry, item_url in marks:
+                if item_url is None or stored is None or item_url in stored:
+                    entries.append(entry)
+                else:
+                    held_back.add(url)
+            if state is None or not entries:
+                continue
+            seen = self._seen.setdefault(url, SeenEntries())
+            seen.add(entries)
+            state.seen_entries = seen.dump()
+            state.seen_before = seen.before
+
+        for url in self._read - held_back:
+            state = states.get(url)
+            if state is not None and url in self._newest:
+                state.last_entry_id = self._newest[url]
+
+        # validatori su sačuvani pri fetch-u -> bez ovoga bi sledeći poll
+        # dobio 304 i neupisani entry-ji se ne bi ponovo pročitali
+        for url in held_back:
+            state = states.get(url)
+            if state is not None:
+                state.etag = None
+                state.last_modified = None
+
+        self._pending_seen.clear()
+        self._read.clear()
+
+        try:
+            self._db.commit()
+        except Exception as e:
+            self._db.rollback()
+            logger.error(f"[feed_fetcher] Could not save seen entries: {e}")
+            return
+        logger.info(f"[feed_fetcher] Skipped {self._skipped_seen} already seen entries")
+
+    def stats(self) -> Dict[str, int]:
+        requests_saved = sum(n - 1 for n in self._refs.values() if n > 1)
+        bytes_saved = sum(
+            self._sizes.get(url, 0) * (n - 1)
+            for url, n in self._refs.items()
+            if n > 1
+        )
+        return {
+            "distinct_feeds": len(self._feeds),
+            "not_modified": self._not_modified,
+            "not_due": self._not_due,
+            "references": sum(self._refs.values()),
+            "requests_saved": requests_saved,
+            "bytes_saved": bytes_saved,
+        }
+
+    def log_stats(self) -> None:
+        st = self.stats()
+        logger.info(
+            f"[feed_fetcher] Feed cache: {st['distinct_feeds']} distinct feeds for "
+            f"{st['references']} references ({st['not_modified']} not modified, "
+            f"{st['not_due']} not due), "
+            f"saved {st['requests_saved']} requests / {st['bytes_saved']} bytes"
+        )
@@ -1,15 +1,33 @@
 import logging
+import os
 import re
-from typing import List, Dict, Optional
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import List, Dict, Optional, Tuple
 
-import feedparser
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from content_version import bump_content_version
 from database import SessionLocal
 from models import Article
+from .feed_fetcher import FeedCache
+from .slugs import (
+    SLUG_RETRY_ATTEMPTS,
+    allocate_unique_slug,
+    reserve_unique_slugs,
+    save_with_unique_slug,
+)
 
 logger = logging.getLogger(__name__)
 
+# Koliko AI rewrite-ova ide paralelno (OpenAI pozivi su I/O)
+AI_WORKERS = int(os.getenv("NEWS_AI_WORKERS", "4"))
+
+# Na koliko AI rezultata radimo jedan commit
+AI_COMMIT_BATCH = int(os.getenv("NEWS_AI_COMMIT_BATCH", "10"))
+
 # Try to import AI rewrite function
 try:
     from .rewrite_ai import rewrite_to_long_form as ai_rewrite_text
@@ -609,9 +627,53 @@ def _detect_sport_and_league_from_text(
     return {"sport": sport, "league": league, "country": country}
 
 
-def _fetch_for_league(config: Dict, max_articles: int) -> List[Dict]:
+def _per_feed_limit(max_articles: Optional[int], n_urls: int) -> Optional[int]:
+    # koliko entry-ja jedna liga uzima iz svakog svog feed-a (None = sve)
+    if not max_articles:
+        return None
+    return max(1, max_articles // max(1, n_urls))
+
+
+def _prefetch_league_feeds(
+    configs: List[Dict],
+    db: Optional[Session] = None,
+    due_only: bool = False,
+    max_per_league: Optional[int] = None,
+) -> FeedCache:
+    """
+    Download all RSS feeds for given leagues in parallel.
+    Every distinct URL is fetched once, even if many leagues use it.
+    With `db`, unchanged feeds are skipped via conditional GET, and with
+    `due_only` feeds that aren't due yet (bot/poll_schedule.py) are skipped.
+    With `max_per_league`, feeds are parsed only as far as any league reads.
+    """
+    urls: List[str] = []
+    limits: Dict[str, Optional[int]] = {}
+    for config in configs:
+        config_urls = _get_rss_urls_for_config(config)
+        limit = _per_feed_limit(max_per_league, len(config_urls))
+        for url in config_urls:
+            urls.append(url)
+            if url in limits and (limits[url] is None or limit is None):
+                limits[url] = None
+            else:
+                limits[url] = max(limits.get(url) or 0, limit or 0) or None
+
+    cache = FeedCache(db=db, due_only=due_only)
+    cache.prefetch(urls, limits)
+    cache.log_stats()
+    return cache
+
+
+def _fetch_for_league(
+    config: Dict,
+    max_articles: int,
+    feeds: Optional[FeedCache] = None,
+) -> List[Dict]:
     """
     Fetch articles for a single league via RSS.
+    If `feeds` is given (prefetched by _prefetch_league_feeds) no network
+    calls are made here for already fetched URLs.
     """
     league_key = config["league"]
     rss_urls = _get_rss_urls_for_config(config)
@@ -620,16 +682,20 @@ def _fetch_for_league(config: Dict, max_articles: int) -> List[Dict]:
         logger.info(f"[fetch_sources] No RSS configured for league={league_key}")
         return []
 
+    if feeds is None:
+        feeds = _prefetch_league_feeds([config], max_per_league=max_articles)
+
     normalized: List[Dict] = []
+    # (feed url, entry, url članka) -> feeds.mark_seen posle odsecanja
+    considered: List[Tuple[str, Dict, Optional[str]]] = []
 
-    per_feed_limit = max_articles
-    if max_articles and len(rss_urls) > 0:
-        per_feed_limit = max(1, max_articles // len(rss_urls))
+    per_feed_limit = _per_feed_limit(max_articles, len(rss_urls))
 
     for url in rss_urls:
         try:
-            logger.info(f"[fetch_sources] Fetching RSS for league={league_key} url={url}")
-            feed = feedparser.parse(url)
+            feed = feeds.get(url)
+            if feed is None:
+                continue
 
             if getattr(feed, "bozo", False):
                 logger.warning(f"[fetch_sources] RSS parse issue for {url}: {feed.bozo_exception}")
@@ -640,14 +706,21 @@ def _fetch_for_league(config: Dict, max_articles: int) -> List[Dict]:
                 entries = entries[:per_feed_limit]
 
             for entry in entries:
+                # obrađen u nekom od prethodnih ciklusa -> bez upita u bazu
+                if feeds.is_seen(url, entry):
+                    continue
+
                 title = entry.get("title")
                 summary = entry.get("summary") or entry.get("description", "")
                 link = entry.get("link")
 
                 if not link or not title:
+                    considered.append((url, entry, None))
                     continue
 
                 image_url = _extract_image_url(entry)
+                # bez slike nikad ne postaje članak
+                considered.append((url, entry, link if image_url else None))
 
                 tags = _detect_sport_and_league_from_text(config, title, summary)
 
@@ -667,7 +740,12 @@ def _fetch_for_league(config: Dict, max_articles: int) -> List[Dict]:
             logger.error(f"[fetch_sources] Error reading RSS for {league_key} ({url}): {e}")
 
     if max_articles:
-        return normalized[:max_articles]
+        normalized = normalized[:max_articles]
+
+    kept = {item["url"] for item in normalized}
+    for url, entry, link in considered:
+        if link is None or link in kept:
+            feeds.mark_seen(url, entry, link)
     return normalized
 
 
@@ -680,6 +758,9 @@ def fetch_all_sports_headlines(
     """
     all_articles: List[Dict] = []
 
+    # svi feed-ovi se skidaju paralelno, pa tek onda redom po ligama
+    feeds = _prefetch_league_feeds(LEAGUE_CONFIG, max_per_league=max_per_league)
+
     for config in LEAGUE_CONFIG:
         if len(all_articles) >= hard_limit:
             break
@@ -687,7 +768,7 @@ def fetch_all_sports_headlines(
         remaining = hard_limit - len(all_articles)
         limit_for_this_league = min(max_per_league, remaining)
 
-        league_articles = _fetch_for_league(config, limit_for_this_league)
+        league_articles = _fetch_for_league(config, limit_for_this_league, feeds)
         all_articles.extend(league_articles)
 
     return all_articles[:hard_limit]
@@ -706,41 +787,32 @@ def _slugify(title: str, fallback: str = "") -> str:
     return slug or "article"
 
 
-def _make_unique_slug(db: Session, base_slug: str, skip_article_id: Optional[int] = None) -> str:
-    """
-    Create unique slug in DB. Can skip one article id (current article).
-    """
-    slug = base_slug
-    counter = 1
+# koliko vrednosti max ide u jedan IN (...) / multi-row INSERT
+_DB_BATCH_SIZE = 500
+
 
-    while True:
-        q = db.query(Article).filter(Article.slug == slug)
-        if skip_article_id is not None:
-            q = q.filter(Article.id != skip_article_id)
-        exists = db.query(q.exists()).scalar()
-        if not exists:
-            return slug
+def _chunks(seq: List, size: int = _DB_BATCH_SIZE):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
 
-        counter += 1
-        slug = f"{base_slug}-{counter}"
 
+def _load_articles_by_external_id(db: Session, external_ids: List[str]) -> Dict[str, Article]:
+    found: Dict[str, Article] = {}
+    for chunk in _chunks(external_ids):
+        for article in db.query(Article).filter(Article.external_id.in_(chunk)).all():
+            found[article.external_id] = article
+    return found
 
-def _get_or_create_article(
-    db: Session, item: Dict
-) -> Optional[Article]:
+
+def _build_article_row(item: Dict) -> Optional[Dict]:
     """
-    Check if Article with given external_id already exists.
-    If not, create a new one.
+    Column values for a new Article from one feed item, without slug.
     We DO NOT create article if it has no image.
     """
     source_url = item.get("url")
     if not source_url:
         return None
 
-    existing = db.query(Article).filter(Article.external_id == source_url).first()
-    if existing:
-        return existing
-
     # image is mandatory
     image_url = item.get("urlToImage")
     if not image_url:
@@ -751,72 +823,137 @@ def _get_or_create_article(
 
     clean_summary = clean_html_text(raw_summary)
 
-    slug_base = _slugify(raw_title)
-    slug = _make_unique_slug(db, slug_base)
-
-    article = Article(
-        external_id=source_url,
-        title=raw_title,  # temporary, AI will update to English title
-        slug=slug,
-        sport=item.get("sport"),
-        league=item.get("league"),
-        country=item.get("country"),
-        division=1,
-        image_url=image_url,
-        source_url=source_url,
-        summary=clean_summary,
-        content=clean_summary,
-        is_live=True,
-    )
+    return {
+        "external_id": source_url,
+        "title": raw_title,  # temporary, AI will update to English title
+        "sport": item.get("sport"),
+        "league": item.get("league"),
+        "country": item.get("country"),
+        "division": 1,
+        "image_url": image_url,
+        "source_url": source_url,
+        "summary": clean_summary,
+        "content": clean_summary,
+        "is_live": True,
+    }
+
+
+def _insert_article_rows(db: Session, rows: List[Dict]) -> None:
+    """
+    Multi-row INSERT of new articles (one transaction, caller commits).
+    On Postgres concurrent duplicates are ignored (ON CONFLICT DO NOTHING).
+    """
+    is_postgres = db.get_bind().dialect.name == "postgresql"
 
-    db.add(article)
-    db.commit()
-    db.refresh(article)
-    return article
+    for chunk in _chunks(rows):
+        if is_postgres:
+            stmt = pg_insert(Article).values(chunk).on_conflict_do_nothing()
+        else:
+            stmt = insert(Article).values(chunk)
+        db.execute(stmt)
 
 
-def _rewrite_article_with_ai(
-    db: Session,
-    article: Article,
-    max_ai_chars: int,
-) -> bool:
+def _ingest_items(db: Session, items: List[Dict]) -> List[Article]:
     """
-    Run AI rewrite for a single article.
-    Returns True if rewritten.
+    Batched version of "get or create" for all feed items of one cycle:
+    - one IN (...) query for existing external_ids
+    - one prefix query to reserve unique slugs
+    - one multi-row INSERT + one commit
+    - one IN (...) query to load the resulting Article rows
+    Rows that lose a slug race with a concurrent writer are retried.
+    Returns articles (existing + new) in feed order, without duplicates.
+    """
+    external_ids = list(dict.fromkeys(item["url"] for item in items if item.get("url")))
+    if not external_ids:
+        return []
+
+    existing = _load_articles_by_external_id(db, external_ids)
+
+    new_rows: List[Dict] = []
+    seen = set(existing)
+    for item in items:
+        row = _build_article_row(item)
+        if row is None or row["external_id"] in seen:
+            continue
+        seen.add(row["external_id"])
+        new_rows.append(row)
+
+    inserted = 0
+    attempt = 0
+    while new_rows:
+        attempt += 1
+        slugs = reserve_unique_slugs(db, [_slugify(row["title"]) for row in new_rows])
+        for row, slug in zip(new_rows, slugs):
+            row["slug"] = slug
+
+        try:
+            _insert_article_rows(db, new_rows)
+            db.commit()
+        except IntegrityError as e:
+            # drugi writer je u međuvremenu upisao isti slug / external_id
+            db.rollback()
+            if attempt >= SLUG_RETRY_ATTEMPTS:
+                logger.error(f"[fetch_sources] Bulk insert of {len(new_rows)} articles failed: {e.orig}")
+                break
+        except Exception as e:
+            db.rollback()
+            logger.error(f"[fetch_sources] Bulk insert of {len(new_rows)} articles failed: {e}")
+            break
+
+        existing = _load_articles_by_external_id(db, external_ids)
+        pending = [row for row in new_rows if row["external_id"] not in existing]
+        inserted += len(new_rows) - len(pending)
+        new_rows = pending
+
+        # ON CONFLICT DO NOTHING (Postgres) tiho preskoči redove sa zauzetim slug-om
+        if new_rows and attempt >= SLUG_RETRY_ATTEMPTS:
+            logger.error(f"[fetch_sources] Gave up inserting {len(new_rows)} articles (slug conflicts)")
+            break
+
+    if inserted:
+        logger.info(f"[fetch_sources] Inserted {inserted} new articles")
+        bump_content_version(db)
+
+    return [existing[eid] for eid in external_ids if eid in existing]
+
+
+def _prepare_ai_input(article: Article, max_ai_chars: int) -> Optional[Dict]:
+    """
+    Build kwargs for ai_rewrite_text from an article (main thread only,
+    touches ORM attributes). Returns None if there is nothing to rewrite.
     """
     base_text = article.content or article.summary or article.title
     if not base_text:
-        return False
+        return None
 
     # uvek očisti HTML pre slanja AI-u
     base_text = clean_html_text(base_text)
     if not base_text.strip():
-        return False
+        return None
 
-    text_for_ai = base_text[:max_ai_chars]
+    return {
+        "title": article.title,
+        "raw_text": base_text[:max_ai_chars],
+        "sport": article.sport or "sports",
+    }
 
-    try:
-        ai_output = ai_rewrite_text(
-            title=article.title,
-            raw_text=text_for_ai,
-            sport=article.sport or "sports",
-        )
-    except Exception as e:
-        logger.error(f"AI rewrite failed for article {article.id}: {e}")
-        return False
 
+def _parse_ai_output(ai_output: Optional[str], current_title: str) -> Optional[Dict]:
+    """
+    Split AI output into English title, body and summary preview.
+    """
     if not ai_output or not ai_output.strip():
-        return False
+        return None
 
     text = ai_output.strip()
     lines = text.splitlines()
 
-    english_title = article.title
+    english_title = current_title
     body = text
 
     if len(lines) >= 3:
         cand_title = lines[0].strip().strip("*").strip()
-        english_title = cand_title or article.title
+        english_title = cand_title or current_title
 
         if len(lines) > 1 and lines[1].strip() == "":
             body_part = lines[2:]
@@ -830,27 +967,209 @@ def _rewrite_article_with_ai(
     if len(preview) > 400:
         preview = preview[:400].rsplit(" ", 1)[0] + "..."
 
-    article.ai_content = body
-    article.ai_generated = True
-    article.summary = preview or article.summary
+    return {"title": english_title, "body": body, "summary": preview}
+
+
+def _apply_ai_output(
+    db: Session,
+    article: Article,
+    ai_output: Optional[str],
+    commit: bool = True,
+) -> bool:
+    """
+    Store AI output on the article (ai_content, summary, English title
+    and slug). With commit=False changes are only flushed, so the caller
+    can commit many articles in one transaction.
+    Returns True if rewritten.
+    """
+    parsed = _parse_ai_output(ai_output, article.title)
+    if not parsed:
+        return False
+
+    english_title = parsed["title"]
+    new_summary = parsed["summary"] or article.summary
+    title_changed = bool(english_title) and english_title != article.title
+
+    def apply_changes():
+        article.ai_content = parsed["body"]
+        article.ai_generated = True
+        article.summary = new_summary
+        if title_changed:
+            article.title = english_title
+
+    if not commit:
+        apply_changes()
+        if title_changed:
+            article.slug = allocate_unique_slug(
+                db, _slugify(english_title), skip_article_id=article.id
+            )
+        db.add(article)
+        # flush da sledeći allocate_unique_slug u istoj transakciji vidi ovaj slug
+        db.flush()
+        return True
 
     # update title and slug to English version
-    if english_title and english_title != article.title:
-        article.title = english_title
-        new_base = _slugify(english_title)
-        article.slug = _make_unique_slug(db, new_base, skip_article_id=article.id)
+    if title_changed:
+        save_with_unique_slug(db, article, _slugify(english_title), apply_changes)
+    else:
+        apply_changes()
+        db.add(article)
+        db.commit()
+    return True
+
+
+def _rewrite_article_with_ai(
+    db: Session,
+    article: Article,
+    max_ai_chars: int,
+) -> bool:
+    """
+    Run AI rewrite for a single article.
+    Returns True if rewritten.
+    """
+    ai_input = _prepare_ai_input(article, max_ai_chars)
+    if not ai_input:
+        return False
+
+    try:
+        ai_output = ai_rewrite_text(**ai_input)
+    except Exception as e:
+        logger.error(f"AI rewrite failed for article {article.id}: {e}")
+        return False
 
-    db.add(article)
-    db.commit()
+    if not _apply_ai_output(db, article, ai_output):
+        return False
+
+    bump_content_version(db)
     return True
 
 
+def _apply_ai_batch(db: Session, results: List[Tuple[Article, str]]) -> int:
+    """
+    Write a batch of AI results in one transaction. If a concurrent writer
+    steals a slug, fall back to one commit (with slug retry) per article.
+    """
+    if not results:
+        return 0
+
+    try:
+        applied = sum(1 for article, output in results if _apply_ai_output(db, article, output, commit=False))
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        logger.warning(f"[fetch_sources] AI batch commit conflict, retrying one by one: {e.orig}")
+        applied = sum(1 for article, output in results if _apply_ai_output(db, article, output))
+
+    if applied:
+        bump_content_version(db)
+    return applied
+
+
+def _rewrite_articles_with_ai(
+    db: Session,
+    articles: List[Article],
+    max_ai_chars: int,
+    budget: int,
+) -> int:
+    """
+    Rewrite articles with a pool of AI workers.
+
+    Only the OpenAI calls run in worker threads (rate limited and retried
+    inside rewrite_ai); all ORM access and DB writes stay on this thread and
+    are committed in batches of AI_COMMIT_BATCH.
+    At most `budget` articles are rewritten; failed ones don't use budget.
+    Returns number of rewritten articles.
+    """
+    if budget <= 0 or not articles:
+        return 0
+
+    rewritten = 0
+    pending_results: List[Tuple[Article, str]] = []
+    candidates = iter(articles)
+    workers = max(1, AI_WORKERS)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ai") as pool:
+        in_flight = {}
+
+        def submit_more():
+            while len(in_flight) < workers and rewritten + len(pending_results) + len(in_flight) < budget:
+                article = next(candidates, None)
+                if article is None:
+                    return
+                ai_input = _prepare_ai_input(article, max_ai_chars)
+                if not ai_input:
+                    continue
+                in_flight[pool.submit(ai_rewrite_text, **ai_input)] = article
+
+        submit_more()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                article = in_flight.pop(future)
+                try:
+                    output = future.result()
+                except Exception as e:
+                    logger.error(f"AI rewrite failed for article {article.id}: {e}")
+                    continue
+                if output and output.strip():
+                    pending_results.append((article, output))
+
+            if len(pending_results) >= AI_COMMIT_BATCH:
+                rewritten += _apply_ai_batch(db, pending_results)
+                pending_results = []
+
+            submit_more()
+
+    rewritten += _apply_ai_batch(db, pending_results)
+    return rewritten
+
+
+def _collect_feed_items(
+    db: Session,
+    max_per_league: int,
+    hard_limit: Optional[int] = None,
+    due_only: bool = False,
+) -> Tuple[List[Dict], FeedCache]:
+    """
+    Normalized feed items for all leagues (STEP 1 of the pipeline).
+    Entries seen in earlier cycles are left out; call save_seen() on the
+    returned FeedCache once the items are stored.
+    """
+    all_items: List[Dict] = []
+
+    # svi feed-ovi se skidaju paralelno, pa tek onda redom po ligama
+    feeds = _prefetch_league_feeds(
+        LEAGUE_CONFIG, db=db, due_only=due_only, max_per_league=max_per_league
+    )
+
+    for config in LEAGUE_CONFIG:
+        if hard_limit is not None and len(all_items) >= hard_limit:
+            break
+
+        remaining = None
+        if hard_limit is not None:
+            remaining = hard_limit - len(all_items)
+
+        limit_for_league = max_per_league
+        if remaining is not None:
+            limit_for_league = min(max_per_league, remaining)
+
+        league_items = _fetch_for_league(config, limit_for_league, feeds)
+        all_items.extend(league_items)
+
+    if hard_limit is not None:
+        all_items = all_items[:hard_limit]
+    return all_items, feeds
+
+
 def fetch_and_store_all_articles(
     max_per_league: int = 3,
     hard_limit: Optional[int] = None,
     use_ai: bool = True,
     max_ai_chars: int = 3000,
     max_ai_articles: Optional[int] = None,
+    rewrite_backlog: bool = True,
+    due_feeds_only: bool = False,
 ) -> int:
     """
     Main bot function:
@@ -858,54 +1177,36 @@ def fetch_and_store_all_articles(
     - pravi Article zapise (samo ako imaju sliku)
     - AI pravi EN title + tekst (za nove + stare koji još nisu ai_generated)
     - vraća broj članaka koje je AI prepisao u ovom run-u
+
+    rewrite_backlog=False preskače STEP 4 (stari članci idu preko
+    bot.batch_rewrite / OpenAI Batch API).
+
+    due_feeds_only=True povlači samo feed-ove kojima je došao red
+    (adaptivni interval po feed-u, vidi bot/poll_schedule.py).
     """
     db = SessionLocal()
     rewritten_count = 0
     ai_budget = max_ai_articles if max_ai_articles is not None else 10_000
 
     try:
-        all_items: List[Dict] = []
-
         # -------- STEP 1: FETCH ITEMS FROM RSS --------
-        for config in LEAGUE_CONFIG:
-            if hard_limit is not None and len(all_items) >= hard_limit:
-                break
-
-            remaining = None
-            if hard_limit is not None:
-                remaining = hard_limit - len(all_items)
-
-            limit_for_league = max_per_league
-            if remaining is not None:
-                limit_for_league = min(max_per_league, remaining)
-
-            league_items = _fetch_for_league(config, limit_for_league)
-            all_items.extend(league_items)
-
-        if hard_limit is not None:
-            all_items = all_items[:hard_limit]
+        all_items, feeds = _collect_feed_items(db, max_per_league, hard_limit, due_feeds_only)
 
         # -------- STEP 2: CREATE/UPDATE ARTICLES FROM FEED --------
-        created_articles: List[Article] = []
-        for item in all_items:
-            article = _get_or_create_article(db=db, item=item)
-            if article:
-                created_articles.append(article)
+        created_articles: List[Article] = _ingest_items(db, all_items)
+        feeds.save_seen({a.external_id for a in created_articles})
 
         # -------- STEP 3: AI REWRITE ZA NOVE --------
         if use_ai and ai_budget > 0:
-            for article in created_articles:
-                if ai_budget <= 0:
-                    break
-                if getattr(article, "ai_generated", False):
-                    continue
-
-                if _rewrite_article_with_ai(db, article, max_ai_chars):
-                    rewritten_count += 1
-                    ai_budget -= 1
+            to_rewrite = [
+                a for a in created_articles if not getattr(a, "ai_generated", False)
+            ]
+            done = _rewrite_articles_with_ai(db, to_rewrite, max_ai_chars, ai_budget)
+            rewritten_count += done
+            ai_budget -= done
 
         # -------- STEP 4: AI REWRITE ZA STARE KOJI NISU PREPISANI --------
-        if use_ai and ai_budget > 0:
+        if use_ai and rewrite_backlog and ai_budget > 0:
             pending = (
                 db.query(Article)
                 .filter(Article.is_live == True)
@@ -915,16 +1216,11 @@ def fetch_and_store_all_articles(
                 .all()
             )
 
-            for article in pending:
-                if ai_budget <= 0:
-                    break
-                # preskoči one koje smo već obradili u ovom run-u
-                if getattr(article, "ai_content", None):
-                    continue
-
-                if _rewrite_article_with_ai(db, article, max_ai_chars):
-                    rewritten_count += 1
-                    ai_budget -= 1
+            # preskoči one koje smo već obradili u ovom run-u
+            to_rewrite = [a for a in pending if not getattr(a, "ai_content", None)]
+            done = _rewrite_articles_with_ai(db, to_rewrite, max_ai_chars, ai_budget)
+            rewritten_count += done
+            ai_budget -= done
 
         return rewritten_count
 
@@ -0,0 +1,128 @@
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from models import FeedState, Lease
+
+logger = logging.getLogger(__name__)
+
+# Više worker procesa (dyno-a) bez lidera: posao se deli preko lease-ova u
+# bazi. Feed-ove zaključava onaj ko ih prvi preuzme (feed_state.locked_*),
+# a jednokratne poslove (pun ciklus, backlog) drži imenovani lease.
+# Kad proces umre, lease istekne i posao preuzima sledeći.
+
+# ime ovog procesa u lease-ovima
+NODE_ID = os.getenv("NEWS_NODE_ID") or f"{socket.gethostname()}:{os.getpid()}"
+
+# koliko dugo je feed zaključan dok ga jedan proces povlači (sekunde)
+FEED_LEASE_SECONDS = int(os.getenv("NEWS_FEED_LEASE_SECONDS", "120"))
+
+
+def _dialect(db: Session) -> str:
+    return db.get_bind().dialect.name
+
+
+def acquire_lease(db: Session, name: str, ttl_seconds: float, owner: str = NODE_ID) -> bool:
+    """
+    Take (or renew) lease `name` for `ttl_seconds`. True if this owner now
+    holds it; False if another owner holds an unexpired lease. Commits.
+    """
+    now = datetime.utcnow()
+    values = {
+        "name": name,
+        "owner": owner,
+        "expires_at": now + timedelta(seconds=ttl_seconds),
+        "acquired_at": now,
+    }
+    dialect = _dialect(db)
+    if dialect == "postgresql":
+        stmt = pg_insert(Lease).values(values)
+    elif dialect == "sqlite":
+        stmt = sqlite_insert(Lease).values(values)
+    else:
+        raise NotImplementedError(f"Leases are not supported on {dialect}")
+
+    # preuzmi samo istekao lease (ili produži svoj)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Lease.name],
+        set_={
+            "owner": stmt.excluded.owner,
+            "expires_at": stmt.excluded.expires_at,
+            "acquired_at": stmt.excluded.acquired_at,
+        },
+        where=or_(Lease.expires_at < now, Lease.owner == owner),
+    ).returning(Lease.name)
+
+    try:
+        acquired = db.execute(stmt).first() is not None
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[leases] Could not acquire {name}: {e}")
+        return False
+    return acquired
+
+
+def release_lease(db: Session, name: str, owner: str = NODE_ID) -> None:
+    db.execute(
+        update(Lease)
+        .where(Lease.name == name, Lease.owner == owner)
+        .values(expires_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def claim_due_feeds(db: Session, urls: List[str], owner: str = NODE_ID) -> List[str]:
+    """
+    Lock the due feeds among `urls` for this owner (FEED_LEASE_SECONDS) and
+    return them. Feeds locked by a live owner are skipped, so concurrent
+    workers never fetch the same feed; locks of dead workers expire.
+    The lock is released by _save_feed_states after the fetch. Commits.
+    """
+    if not urls:
+        return []
+    now = datetime.utcnow()
+
+    # feed_state red mora da postoji da bi mogao da se zaključa
+    rows = [{"url": url} for url in urls]
+    if _dialect(db) == "postgresql":
+        seed = pg_insert(FeedState).values(rows).on_conflict_do_nothing()
+    else:
+        seed = insert(FeedState).values(rows).prefix_with("OR IGNORE")
+
+    due = (
+        select(FeedState.url)
+        .where(
+            FeedState.url.in_(urls),
+            or_(FeedState.next_poll_at.is_(None), FeedState.next_poll_at <= now),
+            or_(FeedState.locked_until.is_(None), FeedState.locked_until < now),
+        )
+        .with_for_update(skip_locked=True)
+    )
+    stmt = (
+        update(FeedState)
+        .where(FeedState.url.in_(due))
+        .values(
+            locked_by=owner,
+            locked_until=now + timedelta(seconds=FEED_LEASE_SECONDS),
+        )
+        .returning(FeedState.url)
+        .execution_options(synchronize_session=False)
+    )
+    try:
+        db.execute(seed)
+        claimed = [row.url for row in db.execute(stmt)]
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[leases] Could not claim feeds: {e}")
+        return []
+    return claimed
@@ -1,9 +1,16 @@
+import logging
+
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from slugify import slugify
+from content_version import bump_content_version
 from database import SessionLocal
 from models import Article
 from .fetch_sources import fetch_all_sports_headlines
 from .rewrite_ai import rewrite_to_long_form
+from .slugs import SLUG_RETRY_ATTEMPTS, reserve_unique_slugs
+
+logger = logging.getLogger(__name__)
 
 
 def run_pipeline():
@@ -18,14 +25,20 @@ def run_pipeline():
         if not articles:
             return
 
-        # 1) Učitaj sve postojeće external_id i slug iz baze
-        existing_external_ids = {
-            ext_id for (ext_id,) in db.query(Article.external_id).all()
-        }
-        existing_slugs = {s for (s,) in db.query(Article.slug).all()}
-
-        # pratimo sve slugove koji postoje + koje pravimo u ovoj turi
-        used_slugs = set(existing_slugs)
+        # 1) Proveri samo external_id-jeve iz ove ture (indeksiran IN upit),
+        #    ne celu tabelu – memorija zavisi od veličine ture, ne arhive
+        candidate_ids = list({item["url"] for item in articles if item.get("url")})
+        existing_external_ids = set()
+        if candidate_ids:
+            existing_external_ids = {
+                ext_id
+                for (ext_id,) in db.query(Article.external_id)
+                .filter(Article.external_id.in_(candidate_ids))
+                .all()
+            }
+
+        new_articles = []
+        base_slugs = []
 
         for item in articles:
             external_id = item.get("url")
@@ -49,25 +62,11 @@ def run_pipeline():
 
             long_form = rewrite_to_long_form(title, raw_text)
 
-            base_slug = slugify(title)[:200] or "article"
-
-            # 2) Napravi unikatan slug (baza + ova tura)
-            unique_slug = base_slug
-            suffix = 1
-            while unique_slug in used_slugs:
-                if suffix == 1:
-                    unique_slug = f"{base_slug}-news"
-                else:
-                    unique_slug = f"{base_slug}-news-{suffix}"
-                suffix += 1
-
-            slug = unique_slug
-            used_slugs.add(slug)
+            base_slugs.append(slugify(title)[:200] or "article")
 
             article = Article(
                 external_id=external_id,
                 title=title,
-                slug=slug,
                 sport=item.get("sport"),
                 league=item.get("league"),
                 country=item.get("country"),
@@ -78,12 +77,48 @@ def run_pipeline():
                 content=long_form,
             )
 
-            db.add(article)
+            new_articles.append(article)
 
             # da sledeći put znamo da već postoji
             existing_external_ids.add(external_id)
 
-        db.commit()
+        # 2) Unikatni slugovi za celu turu (jedan upit, isti allocator kao bot).
+        #    Ako drugi writer u međuvremenu upiše isti slug / external_id,
+        #    unique index baci IntegrityError -> izbaci već upisane i probaj
+        #    ponovo, da ne bacimo ceo batch plaćenih rewrite-ova.
+        for attempt in range(1, SLUG_RETRY_ATTEMPTS + 1):
+            slugs = reserve_unique_slugs(db, base_slugs)
+            for article, slug in zip(new_articles, slugs):
+                article.slug = slug
+                db.add(article)
+
+            try:
+                db.commit()
+                break
+            except IntegrityError as e:
+                db.rollback()
+                if attempt == SLUG_RETRY_ATTEMPTS:
+                    raise
+                logger.warning(
+                    f"[pipeline] Insert conflict (attempt {attempt}/{SLUG_RETRY_ATTEMPTS}): {e.orig}"
+                )
+
+            taken = {
+                ext_id
+                for (ext_id,) in db.query(Article.external_id)
+                .filter(Article.external_id.in_([a.external_id for a in new_articles]))
+                .all()
+            }
+            kept = [
+                (article, base)
+                for article, base in zip(new_articles, base_slugs)
+                if article.external_id not in taken
+            ]
+            new_articles = [article for article, _ in kept]
+            base_slugs = [base for _, base in kept]
+
+        if new_articles:
+            bump_content_version(db)
 
     finally:
         db.close()
@@ -0,0 +1,161 @@
+import calendar
+import logging
+import os
+import re
+import statistics
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+from urllib.parse import urlparse
+
+from models import FeedState
+
+logger = logging.getLogger(__name__)
+
+# Adaptivno osvežavanje: svaki feed ima svoj interval, naučen iz razmaka
+# između objava. Brzi feed-ovi (ESPN, Sky) se proveravaju na par minuta,
+# tihi sve ređe (backoff), a ttl / skipHours iz RSS-a se poštuju.
+
+# granice intervala (minuti)
+POLL_MIN_MINUTES = float(os.getenv("NEWS_POLL_MIN_MINUTES", "2"))
+POLL_MAX_MINUTES = float(os.getenv("NEWS_POLL_MAX_MINUTES", "120"))
+
+# interval za feed o kome još ništa ne znamo
+POLL_DEFAULT_MINUTES = float(os.getenv("NEWS_POLL_DEFAULT_MINUTES", "10"))
+
+# proveravamo češće nego što feed objavljuje (0.5 = dvaput po razmaku)
+POLL_CADENCE_FACTOR = float(os.getenv("NEWS_POLL_CADENCE_FACTOR", "0.5"))
+
+# množilac kad feed nema ništa novo (ili ne radi)
+POLL_BACKOFF = float(os.getenv("NEWS_POLL_BACKOFF", "1.5"))
+
+# težina novog merenja u proseku razmaka između objava (EWMA)
+POLL_EWMA_ALPHA = float(os.getenv("NEWS_POLL_EWMA_ALPHA", "0.3"))
+
+# hostovi sa breaking news – interval im nikad ne prelazi FAST_MAX
+POLL_FAST_HOSTS = [
+    h.strip().lower()
+    for h in os.getenv("NEWS_POLL_FAST_HOSTS", "espn.com,skysports.com").split(",")
+    if h.strip()
+]
+POLL_FAST_MAX_MINUTES = float(os.getenv("NEWS_POLL_FAST_MAX_MINUTES", "5"))
+
+# koliko poslednjih objava gledamo kad računamo razmak
+_CADENCE_SAMPLE = 10
+
+_SKIP_HOURS_RE = re.compile(rb"<skipHours>(.*?)</skipHours>", re.S | re.I)
+_HOUR_RE = re.compile(rb"<hour>\s*(\d{1,2})\s*</hour>", re.I)
+
+
+def parse_skip_hours(content: bytes) -> Optional[str]:
+    """
+    RSS <skipHours> as "1,2,3" (GMT hours). feedparser keeps only the last
+    <hour>, so the raw document is scanned instead.
+    """
+    match = _SKIP_HOURS_RE.search(content)
+    if not match:
+        return None
+    hours = sorted({int(h) for h in _HOUR_RE.findall(match.group(1)) if int(h) < 24})
+    return ",".join(str(h) for h in hours) or None
+
+
+def _parse_hours(value: Optional[str]) -> Set[int]:
+    if not value:
+        return set()
+    return {int(h) for h in value.split(",") if h.strip().isdigit()}
+
+
+def _entry_times(feed) -> List[datetime]:
+    times = []
+    for entry in getattr(feed, "entries", None) or []:
+        parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+        if parsed:
+            times.append(datetime.utcfromtimestamp(calendar.timegm(parsed)))
+    return sorted(times, reverse=True)
+
+
+def _publish_gap_seconds(times: List[datetime]) -> Optional[float]:
+    """
+    Median gap between the newest entries (None if not enough data).
+    """
+    recent = times[:_CADENCE_SAMPLE]
+    gaps = [
+        (newer - older).total_seconds()
+        for newer, older in zip(recent, recent[1:])
+        if newer > older
+    ]
+    if not gaps:
+        return None
+    return statistics.median(gaps)
+
+
+def _is_fast_host(url: str) -> bool:
+    host = urlparse(url).netloc.lower()
+    return any(host == h or host.endswith("." + h) for h in POLL_FAST_HOSTS)
+
+
+def _next_allowed(when: datetime, skip_hours: Set[int]) -> datetime:
+    # pomeri na početak prvog sata koji nije u skipHours
+    if len(skip_hours) >= 24:
+        return when
+    while when.hour in skip_hours:
+        when = when.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    return when
+
+
+def update_schedule(state: FeedState, result: Dict, now: datetime) -> None:
+    """
+    Update learned cadence and next_poll_at after one fetch attempt.
+    `result` is a feed_fetcher download result (feed, status, ttl, ...).
+    """
+    min_s = POLL_MIN_MINUTES * 60
+    max_s = POLL_MAX_MINUTES * 60
+    if _is_fast_host(state.url):
+        max_s = min(max_s, POLL_FAST_MAX_MINUTES * 60)
+
+    current = state.poll_interval or POLL_DEFAULT_MINUTES * 60
+    feed = result.get("feed")
+
+    times = _entry_times(feed) if feed is not None else []
+    newest = times[0] if times else None
+    has_new = newest is not None and (
+        state.last_entry_at is None or newest > state.last_entry_at
+    )
+
+    # posle ranog prekida parsiranja vidimo samo nove entry-je -> poslednji
+    # poznati (last_entry_at) je stariji uzorak za razmak
+    samples = times
+    if state.last_entry_at is not None:
+        samples = sorted(set(times) | {state.last_entry_at}, reverse=True)
+    gap = _publish_gap_seconds(samples)
+    if gap is not None:
+        if state.publish_interval:
+            gap = POLL_EWMA_ALPHA * gap + (1 - POLL_EWMA_ALPHA) * state.publish_interval
+        state.publish_interval = int(gap)
+
+    if has_new:
+        state.last_entry_at = newest
+        if state.publish_interval:
+            interval = state.publish_interval * POLL_CADENCE_FACTOR
+        else:
+            interval = POLL_DEFAULT_MINUTES * 60
+    else:
+        # 304, ništa novo ili greška -> ređe
+        interval = current * POLL_BACKOFF
+
+    if feed is not None:
+        # dokument pročitan samo do pola (rani prekid) -> hint možda nije viđen
+        complete = result.get("complete", True)
+        if complete or result.get("ttl") is not None:
+            state.ttl_minutes = result.get("ttl")
+        if complete or result.get("skip_hours") is not None:
+            state.skip_hours = result.get("skip_hours")
+
+    # ttl = koliko minuta izdavač kaže da je feed "svež"
+    if state.ttl_minutes:
+        interval = max(interval, min(state.ttl_minutes * 60, max_s))
+
+    interval = max(min_s, min(max_s, interval))
+    state.poll_interval = int(interval)
+    state.next_poll_at = _next_allowed(
+        now + timedelta(seconds=interval), _parse_hours(state.skip_hours)
+    )
@@ -1,16 +1,170 @@
 # bot/rewrite_ai.py
 
+import atexit
 import os
 import logging
+import random
+import threading
+import time
 from typing import Optional
 
 import httpx
 
+from .rewrite_cache import get_cached_rewrite, make_cache_key, store_rewrite
+
 logger = logging.getLogger(__name__)
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4.1-mini")
 
+# može se preusmeriti na lokalni fake server za testiranje
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+
+# limiti naloga (0 = bez limita)
+OPENAI_REQUESTS_PER_MIN = int(os.getenv("OPENAI_REQUESTS_PER_MIN", "500"))
+OPENAI_TOKENS_PER_MIN = int(os.getenv("OPENAI_TOKENS_PER_MIN", "200000"))
+
+# retry za 429 / 5xx / timeout
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "4"))
+OPENAI_BACKOFF_BASE = float(os.getenv("OPENAI_BACKOFF_BASE", "1.0"))
+OPENAI_BACKOFF_MAX = float(os.getenv("OPENAI_BACKOFF_MAX", "30"))
+
+OPENAI_MAX_TOKENS = 900
+
+# deljeni HTTP klijent: pool konekcija + keep-alive
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+OPENAI_READ_TIMEOUT = float(os.getenv("OPENAI_READ_TIMEOUT", "60"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "10"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "60"))
+OPENAI_HTTP2 = os.getenv("OPENAI_HTTP2", "1") == "1"
+
+
+# ================== SHARED HTTP CLIENT ==================
+
+_client_lock = threading.Lock()
+_client: Optional[httpx.Client] = None
+_async_client: Optional[httpx.AsyncClient] = None
+
+_metrics_lock = threading.Lock()
+_metrics = {"requests": 0, "new_connections": 0}
+
+
+def _http2_available() -> bool:
+    if not OPENAI_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _client_kwargs() -> dict:
+    return {
+        "timeout": httpx.Timeout(
+            OPENAI_READ_TIMEOUT,
+            connect=OPENAI_CONNECT_TIMEOUT,
+        ),
+        "limits": httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_KEEPALIVE,
+            keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+        ),
+        "http2": _http2_available(),
+    }
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Process-wide pooled client for OpenAI calls (thread-safe, reused by
+    all AI workers so TCP/TLS setup is paid once per connection).
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        with _client_lock:
+            if _client is None or _client.is_closed:
+                _client = httpx.Client(
+                    event_hooks={"request": [_on_request]},
+                    **_client_kwargs(),
+                )
+    return _client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Async variant with the same pool settings. Must be used from one
+    event loop; close it with aclose_http_clients().
+    """
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        with _client_lock:
+            if _async_client is None or _async_client.is_closed:
+                _async_client = httpx.AsyncClient(
+                    event_hooks={"request": [_aon_request]},
+                    **_client_kwargs(),
+                )
+    return _async_client
+
+
+def close_http_clients() -> None:
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+async def aclose_http_clients() -> None:
+    global _async_client
+    close_http_clients()
+    with _client_lock:
+        client, _async_client = _async_client, None
+    if client is not None:
+        await client.aclose()
+
+
+atexit.register(close_http_clients)
+
+
+def _trace(event_name: str, info: dict) -> None:
+    # httpcore javlja connect_tcp samo kad otvara NOVU konekciju
+    if event_name == "connection.connect_tcp.started":
+        with _metrics_lock:
+            _metrics["new_connections"] += 1
+
+
+async def _atrace(event_name: str, info: dict) -> None:
+    _trace(event_name, info)
+
+
+def _on_request(request: httpx.Request) -> None:
+    with _metrics_lock:
+        _metrics["requests"] += 1
+    request.extensions["trace"] = _trace
+
+
+async def _aon_request(request: httpx.Request) -> None:
+    with _metrics_lock:
+        _metrics["requests"] += 1
+    request.extensions["trace"] = _atrace
+
+
+def http_client_metrics() -> dict:
+    """
+    Connection reuse stats of the shared clients since process start.
+    """
+    with _metrics_lock:
+        requests = _metrics["requests"]
+        new_connections = _metrics["new_connections"]
+    reused = max(0, requests - new_connections)
+    return {
+        "requests": requests,
+        "new_connections": new_connections,
+        "reused_connections": reused,
+        "reuse_ratio": round(reused / requests, 3) if requests else 0.0,
+    }
+
 if not OPENAI_API_KEY:
     logger.warning(
         "[rewrite_ai] OPENAI_API_KEY is not set. "
@@ -18,54 +172,209 @@ if not OPENAI_API_KEY:
     )
 
 
+class _TokenBucket:
+    """
+    Classic token bucket: `rate_per_min` tokens refill continuously,
+    bucket holds at most one minute worth of tokens.
+    """
+
+    def __init__(self, rate_per_min: int):
+        self.rate_per_sec = rate_per_min / 60.0
+        self.capacity = float(rate_per_min)
+        self.tokens = float(rate_per_min)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate_per_sec)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate_per_sec
+
+    def take(self, amount: float) -> None:
+        self.tokens -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter for OpenAI requests/min and tokens/min.
+    acquire() blocks until both buckets have room.
+    """
+
+    def __init__(self, requests_per_min: int, tokens_per_min: int):
+        self._lock = threading.Lock()
+        self._requests = _TokenBucket(requests_per_min) if requests_per_min > 0 else None
+        self._tokens = _TokenBucket(tokens_per_min) if tokens_per_min > 0 else None
+
+    def acquire(self, tokens: int) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = 0.0
+                if self._requests:
+                    wait = max(wait, self._requests.wait_time(1, now))
+                if self._tokens:
+                    wait = max(wait, self._tokens.wait_time(tokens, now))
+
+                if wait <= 0:
+                    if self._requests:
+                        self._requests.take(1)
+                    if self._tokens:
+                        self._tokens.take(tokens)
+                    return
+
+            time.sleep(wait)
+
+
+_rate_limiter = RateLimiter(OPENAI_REQUESTS_PER_MIN, OPENAI_TOKENS_PER_MIN)
+
+
+def _estimate_tokens(prompt: str) -> int:
+    # gruba procena: ~4 karaktera po tokenu + maksimalni odgovor
+    return len(prompt) // 4 + OPENAI_MAX_TOKENS
+
+
+def _backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """
+    Exponential backoff with full jitter; honors Retry-After (seconds).
+    """
+    if retry_after:
+        try:
+            return min(float(retry_after), OPENAI_BACKOFF_MAX)
+        except ValueError:
+            pass
+    cap = min(OPENAI_BACKOFF_MAX, OPENAI_BACKOFF_BASE * (2 ** attempt))
+    return random.uniform(0, cap)
+
+
+def _is_retryable_status(status_code: int) -> bool:
+    return status_code == 429 or status_code >= 500
+
+
+def openai_headers() -> dict:
+    return {
+        "Authorization": f"Bearer {OPENAI_API_KEY}",
+    }
+
+
+def build_chat_payload(prompt: str) -> dict:
+    """
+    Chat completions request body for one rewrite prompt
+    (used by live calls and by Batch API input files).
+    """
+    return {
+        "model": OPENAI_MODEL,
+        "messages": [
+            {
+                "role": "system",
+                "content": (
+                    "You are a professional sports journalist.\n"
+                    "- You ALWAYS write in natural, fluent ENGLISH only.\n"
+                    "- You never include sentences in other languages.\n"
+                    "- Ignore any HTML tags (like <img>, <br>, <a>) and never copy them.\n"
+                    "- Output format MUST be:\n"
+                    "  1) First line: English headline, plain text, no quotes, no markdown.\n"
+                    "  2) One blank line.\n"
+                    "  3) Several paragraphs of article text in English.\n"
+                ),
+            },
+            {
+                "role": "user",
+                "content": prompt,
+            },
+        ],
+        "temperature": 0.5,
+        "max_tokens": OPENAI_MAX_TOKENS,
+    }
+
+
 def _call_openai(prompt: str) -> Optional[str]:
     """
     Low-level call to OpenAI chat completions.
     Returns a single string: first line is English headline,
     blank line, then the rest is the article body.
+
+    Waits on the shared requests/tokens per minute limiter and retries
+    429 / 5xx / network errors with jittered exponential backoff.
     """
     if not OPENAI_API_KEY:
         return None
 
-    try:
-        with httpx.Client(timeout=60) as client:
-            resp = client.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {OPENAI_API_KEY}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": OPENAI_MODEL,
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": (
-                                "You are a professional sports journalist.\n"
-                                "- You ALWAYS write in natural, fluent ENGLISH only.\n"
-                                "- You never include sentences in other languages.\n"
-                                "- Ignore any HTML tags (like <img>, <br>, <a>) and never copy them.\n"
-                                "- Output format MUST be:\n"
-                                "  1) First line: English headline, plain text, no quotes, no markdown.\n"
-                                "  2) One blank line.\n"
-                                "  3) Several paragraphs of article text in English.\n"
-                            ),
-                        },
-                        {
-                            "role": "user",
-                            "content": prompt,
-                        },
-                    ],
-                    "temperature": 0.5,
-                    "max_tokens": 900,
-                },
+    payload = build_chat_payload(prompt)
+
+    for attempt in range(OPENAI_MAX_RETRIES + 1):
+        _rate_limiter.acquire(_estimate_tokens(prompt))
+
+        retry_after = None
+        try:
+            resp = get_http_client().post(
+                f"{OPENAI_BASE_URL}/chat/completions",
+                headers=openai_headers(),
+                json=payload,
             )
-        resp.raise_for_status()
-        data = resp.json()
-        return data["choices"][0]["message"]["content"].strip()
-    except Exception as e:
-        logger.error(f"[rewrite_ai] OpenAI call failed: {e}")
-        return None
+
+            if _is_retryable_status(resp.status_code):
+                retry_after = resp.headers.get("retry-after")
+                error = f"HTTP {resp.status_code}"
+            else:
+                resp.raise_for_status()
+                data = resp.json()
+                return data["choices"][0]["message"]["content"].strip()
+
+        except (httpx.TimeoutException, httpx.TransportError) as e:
+            error = str(e) or e.__class__.__name__
+        except Exception as e:
+            logger.error(f"[rewrite_ai] OpenAI call failed: {e}")
+            return None
+
+        if attempt >= OPENAI_MAX_RETRIES:
+            logger.error(f"[rewrite_ai] OpenAI call failed after {attempt + 1} attempts: {error}")
+            return None
+
+        delay = _backoff_delay(attempt, retry_after)
+        logger.warning(
+            f"[rewrite_ai] OpenAI call failed ({error}), "
+            f"retry {attempt + 1}/{OPENAI_MAX_RETRIES} in {delay:.1f}s"
+        )
+        time.sleep(delay)
+
+    return None
+
+
+# menjaj kad se menja tekst prompta – stari keš se tada više ne koristi
+PROMPT_VERSION = "v1"
+
+
+def build_rewrite_prompt(base_title: str, base_text: str, sport: str = "sports") -> str:
+    return (
+        f"SPORT: {sport}\n\n"
+        f"ORIGINAL TITLE:\n{base_title}\n\n"
+        "SOURCE TEXT (may contain a different language and some HTML tags):\n"
+        f"{base_text}\n\n"
+        "TASK:\n"
+        "- Write a sports news piece in ENGLISH only.\n"
+        "- If the original language is not English, translate and rewrite it into English.\n"
+        "- DO NOT include any sentences in the original language.\n"
+        "- Ignore HTML tags (<img>, <br>, <a>, etc.) and do not copy them.\n"
+        "- Output format MUST be:\n"
+        "  First line: English headline, no quotes, no markdown.\n"
+        "  Then a blank line.\n"
+        "  Then 3–6 paragraphs of English article text.\n"
+    )
+
+
+def rewrite_cache_key(title: str, raw_text: str, sport: str = "sports") -> str:
+    return make_cache_key(
+        OPENAI_MODEL,
+        PROMPT_VERSION,
+        sport,
+        (title or "").strip(),
+        (raw_text or "").strip(),
+    )
 
 
 def rewrite_to_long_form(title: str, raw_text: str, sport: str = "sports") -> str:
@@ -82,6 +391,9 @@ def rewrite_to_long_form(title: str, raw_text: str, sport: str = "sports") -> st
         * first line = English headline
         * blank line
         * rest = English article body
+
+    Identical requests are answered from the rewrite cache (see
+    bot.rewrite_cache) without calling OpenAI.
     """
     base_title = (title or "").strip()
     base_text = (raw_text or "").strip()
@@ -89,21 +401,12 @@ def rewrite_to_long_form(title: str, raw_text: str, sport: str = "sports") -> st
     if not base_title and not base_text:
         return ""
 
-    prompt = (
-        f"SPORT: {sport}\n\n"
-        f"ORIGINAL TITLE:\n{base_title}\n\n"
-        "SOURCE TEXT (may contain a different language and some HTML tags):\n"
-        f"{base_text}\n\n"
-        "TASK:\n"
-        "- Write a sports news piece in ENGLISH only.\n"
-        "- If the original language is not English, translate and rewrite it into English.\n"
-        "- DO NOT include any sentences in the original language.\n"
-        "- Ignore HTML tags (<img>, <br>, <a>, etc.) and do not copy them.\n"
-        "- Output format MUST be:\n"
-        "  First line: English headline, no quotes, no markdown.\n"
-        "  Then a blank line.\n"
-        "  Then 3–6 paragraphs of English article text.\n"
-    )
+    cache_key = rewrite_cache_key(base_title, base_text, sport)
+    cached = get_cached_rewrite(cache_key)
+    if cached:
+        return cached
+
+    prompt = build_rewrite_prompt(base_title, base_text, sport)
 
     ai_result = _call_openai(prompt)
 
@@ -118,4 +421,5 @@ def rewrite_to_long_form(title: str, raw_text: str, sport: str = "sports") -> st
         text = re.sub(r"\s+", " ", text).strip()
         return text
 
+    store_rewrite(cache_key, OPENAI_MODEL, ai_result)
     return ai_result
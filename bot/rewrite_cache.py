@@ -0,0 +1,188 @@
+import hashlib
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from database import SessionLocal
+from models import AIRewriteCache
+
+logger = logging.getLogger(__name__)
+
+AI_CACHE_ENABLED = os.getenv("AI_CACHE_ENABLED", "1") == "1"
+
+# koliko dugo čuvamo rezultat i koliko redova max
+AI_CACHE_TTL_DAYS = int(os.getenv("AI_CACHE_TTL_DAYS", "30"))
+AI_CACHE_MAX_ROWS = int(os.getenv("AI_CACHE_MAX_ROWS", "50000"))
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def make_cache_key(model: str, prompt_version: str, sport: str, title: str, text: str) -> str:
+    """
+    Stable key for one rewrite request. Title/text whitespace is
+    normalized so trivial feed differences still hit the cache.
+    """
+    parts = [
+        model,
+        prompt_version,
+        sport or "",
+        " ".join((title or "").split()),
+        " ".join((text or "").split()),
+    ]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_cached_rewrite(key: str) -> Optional[str]:
+    """
+    Return cached AI output or None. Expired rows count as a miss.
+    Safe to call from worker threads (own session per call).
+    """
+    if not AI_CACHE_ENABLED:
+        return None
+
+    db = SessionLocal()
+    try:
+        row = db.get(AIRewriteCache, key)
+        cutoff = datetime.utcnow() - timedelta(days=AI_CACHE_TTL_DAYS)
+        if row is None or (row.created_at and row.created_at < cutoff):
+            _count("misses")
+            return None
+
+        row.last_used_at = datetime.utcnow()
+        db.commit()
+        _count("hits")
+        return row.output
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[rewrite_cache] Lookup failed: {e}")
+        return None
+    finally:
+        db.close()
+
+
+def get_cached_rewrites(keys: List[str]) -> Dict[str, str]:
+    """
+    Bulk lookup (one IN query) – {key: output} for fresh cached keys.
+    """
+    if not AI_CACHE_ENABLED or not keys:
+        return {}
+
+    db = SessionLocal()
+    try:
+        cutoff = datetime.utcnow() - timedelta(days=AI_CACHE_TTL_DAYS)
+        rows = (
+            db.query(AIRewriteCache)
+            .filter(AIRewriteCache.key.in_(keys))
+            .filter(AIRewriteCache.created_at >= cutoff)
+            .all()
+        )
+        now = datetime.utcnow()
+        for row in rows:
+            row.last_used_at = now
+        db.commit()
+
+        with _stats_lock:
+            _stats["hits"] += len(rows)
+            _stats["misses"] += len(set(keys)) - len(rows)
+        return {row.key: row.output for row in rows}
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[rewrite_cache] Bulk lookup failed: {e}")
+        return {}
+    finally:
+        db.close()
+
+
+def store_rewrite(key: str, model: str, output: str) -> None:
+    if not AI_CACHE_ENABLED or not output:
+        return
+
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        db.merge(
+            AIRewriteCache(
+                key=key,
+                model=model,
+                output=output,
+                created_at=now,
+                last_used_at=now,
+            )
+        )
+        db.commit()
+    except IntegrityError:
+        # drugi worker je upisao isti ključ u međuvremenu
+        db.rollback()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[rewrite_cache] Store failed: {e}")
+    finally:
+        db.close()
+
+
+def prune_rewrite_cache() -> int:
+    """
+    Evict expired rows, then least recently used rows above
+    AI_CACHE_MAX_ROWS. Returns number of deleted rows.
+    """
+    if not AI_CACHE_ENABLED:
+        return 0
+
+    db = SessionLocal()
+    try:
+        cutoff = datetime.utcnow() - timedelta(days=AI_CACHE_TTL_DAYS)
+        deleted = (
+            db.query(AIRewriteCache)
+            .filter(AIRewriteCache.created_at < cutoff)
+            .delete(synchronize_session=False)
+        )
+
+        excess = db.query(AIRewriteCache).count() - AI_CACHE_MAX_ROWS
+        if excess > 0:
+            oldest = (
+                db.query(AIRewriteCache.key)
+                .order_by(AIRewriteCache.last_used_at.asc())
+                .limit(excess)
+                .subquery()
+            )
+            deleted += (
+                db.query(AIRewriteCache)
+                .filter(AIRewriteCache.key.in_(oldest.select()))
+                .delete(synchronize_session=False)
+            )
+
+        db.commit()
+        return deleted
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[rewrite_cache] Prune failed: {e}")
+        return 0
+    finally:
+        db.close()
+
+
+def pop_cache_stats() -> Dict[str, float]:
+    """
+    Hit/miss counters since the last call (one scheduler cycle).
+    """
+    with _stats_lock:
+        hits, misses = _stats["hits"], _stats["misses"]
+        _stats["hits"] = 0
+        _stats["misses"] = 0
+
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 3) if total else 0.0,
+    }
@@ -1,9 +1,20 @@
 import logging
 import os
+import time
 
 from apscheduler.schedulers.blocking import BlockingScheduler
 
-from .fetch_sources import fetch_and_store_all_articles
+from content_version import read_content_version
+from database import SessionLocal, pool_metrics
+from front_page import save_front_page
+from migrations import run_migrations
+from .batch_rewrite import run_backlog_batches
+from .fetch_sources import LEAGUE_CONFIG, fetch_and_store_all_articles
+from .leases import acquire_lease
+from .rewrite_ai import http_client_metrics
+from .rewrite_cache import pop_cache_stats, prune_rewrite_cache
+from .stages import enqueue_rewrite_backlog, fetch_stage
+from .work_queue import queue_stats
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -11,54 +22,205 @@ logger = logging.getLogger(__name__)
 # Na koliko minuta da radi jedan run (default 10 min)
 INTERVAL_MINUTES = int(os.getenv("NEWS_FETCH_INTERVAL_MINUTES", "10"))
 
-# Koliko AI članaka sme da obradi po jednom run-u
+# Koliko AI članaka sme da obradi po jednom run-u (INTERVAL_MINUTES prozoru)
 MAX_AI_ARTICLES = int(os.getenv("NEWS_MAX_AI_ARTICLES", "100"))
 
+# Stari (još neprepisani) članci: "sync" = u istom run-u, "batch" = OpenAI Batch API
+AI_BACKLOG_MODE = os.getenv("NEWS_AI_BACKLOG_MODE", "sync")
 
-def job():
+# Adaptivno osvežavanje: scheduler "kucne" svakih NEWS_POLL_TICK_SECONDS i
+# povlači samo feed-ove kojima je došao red (bot/poll_schedule.py).
+# Backlog rewrite, batch, keš i metrike i dalje idu na INTERVAL_MINUTES.
+ADAPTIVE_POLLING = os.getenv("NEWS_ADAPTIVE_POLLING", "1") == "1"
+POLL_TICK_SECONDS = int(os.getenv("NEWS_POLL_TICK_SECONDS", "60"))
+
+# "inline" = ceo pipeline u ovom procesu; "queue" = ovde samo fetch, a
+# ingest i AI rewrite rade `python -m bot.worker` procesi (bot/stages.py)
+PIPELINE_MODE = os.getenv("NEWS_PIPELINE_MODE", "inline")
+
+_last_full_run = None
+_front_page_version = None
+
+# MAX_AI_ARTICLES važi za INTERVAL_MINUTES prozor, ne za svaki adaptivni tick
+_ai_window_start = None
+_ai_used = 0
+
+
+def _ai_budget_left() -> int:
+    global _ai_window_start, _ai_used
+    now = time.monotonic()
+    if _ai_window_start is None or now - _ai_window_start >= INTERVAL_MINUTES * 60:
+        _ai_window_start = now
+        _ai_used = 0
+    return max(0, MAX_AI_ARTICLES - _ai_used)
+
+
+def _refresh_front_page():
+    # naslovna (poslednji članci po ligi/sportu) za /articles/front-page
+    db = SessionLocal()
+    try:
+        save_front_page(
+            db,
+            leagues=[cfg["league"] for cfg in LEAGUE_CONFIG],
+            sports=[cfg["sport"] for cfg in LEAGUE_CONFIG],
+        )
+    finally:
+        db.close()
+
+
+def _content_version() -> int:
+    db = SessionLocal()
+    try:
+        return read_content_version(db)
+    except Exception:
+        return -1
+    finally:
+        db.close()
+
+
+def _run_queue_pipeline(full: bool) -> int:
+    # samo fetch; članke upisuju i prepisuju bot.worker procesi
+    fetch_stage(max_per_league=5, due_only=ADAPTIVE_POLLING)
+    if full and AI_BACKLOG_MODE != "batch":
+        enqueue_rewrite_backlog()
+    return 0
+
+
+def job(full: bool = True):
     """
     Jedan ciklus:
-    - povuče vesti sa RSS-a za sve lige
+    - povuče vesti sa RSS-a za sve lige (samo feed-ove kojima je došao red)
     - upiše nove Article zapise u bazu
     - uradi AI rewrite u ai_content (nove + deo starih koji nisu prevedeni)
+
+    full=False (adaptivni tick) preskače stare članke i održavanje.
     """
+    global _front_page_version, _ai_used
     logger.info("Running NinkoSports pipeline (scheduled job)...")
     try:
-        rewritten = fetch_and_store_all_articles(
-            max_per_league=5,                 # max 3 članka po ligi po run-u
-            hard_limit=None,                  # nema ukupnog total limita po run-u
-            use_ai=True,                      # koristi OpenAI
-            max_ai_chars=3000,                # max dužina ulaznog teksta
-            max_ai_articles=MAX_AI_ARTICLES,  # max AI rewritova po run-u
-        )
+        if PIPELINE_MODE == "queue":
+            rewritten = _run_queue_pipeline(full)
+        else:
+            rewritten = fetch_and_store_all_articles(
+                max_per_league=5,                 # max 3 članka po ligi po run-u
+                hard_limit=None,                  # nema ukupnog total limita po run-u
+                use_ai=True,                      # koristi OpenAI
+                max_ai_chars=3000,                # max dužina ulaznog teksta
+                max_ai_articles=_ai_budget_left(),  # ostatak budžeta u ovom intervalu
+                rewrite_backlog=full and AI_BACKLOG_MODE != "batch",
+                due_feeds_only=ADAPTIVE_POLLING,
+            )
+            _ai_used += rewritten
+        if full and AI_BACKLOG_MODE == "batch":
+            rewritten += run_backlog_batches(max_ai_chars=3000)
+
+        # naslovna se pravi i kad su članke upisali drugi procesi (queue mod)
+        version = _content_version()
+        if full or version != _front_page_version:
+            _refresh_front_page()
+            _front_page_version = _content_version()
         logger.info(
             "NinkoSports pipeline finished successfully. "
             "AI rewrote %s articles in this run.",
             rewritten,
         )
+        if not full:
+            return
+        logger.info("OpenAI HTTP client: %s", http_client_metrics())
+        logger.info("DB pool: %s", pool_metrics())
+        if PIPELINE_MODE == "queue":
+            db = SessionLocal()
+            try:
+                logger.info("Work queue: %s", queue_stats(db))
+            finally:
+                db.close()
+        logger.info(
+            "AI rewrite cache: %s (evicted %s rows)",
+            pop_cache_stats(),
+            prune_rewrite_cache(),
+        )
     except Exception as e:
         logger.exception(f"NinkoSports pipeline failed: {e}")
 
 
+def _acquire_full_run() -> bool:
+    # više worker procesa: pun ciklus radi samo onaj ko drži "full-run" lease
+    db = SessionLocal()
+    try:
+        return acquire_lease(db, "full-run", INTERVAL_MINUTES * 60)
+    finally:
+        db.close()
+
+
+def interval_job():
+    """
+    Pun ciklus na INTERVAL_MINUTES (NEWS_ADAPTIVE_POLLING=0). Sa više
+    worker procesa radi ga samo onaj ko drži "full-run" lease, da se
+    feed-ovi i backlog ne povlače/prepisuju više puta.
+    """
+    if _acquire_full_run():
+        job(full=True)
+    else:
+        logger.info("Full run is held by another worker, skipping this interval")
+
+
+def tick():
+    """
+    Adaptivni run: svaki put feed-ovi kojima je došao red (i koje nije
+    uzeo drugi worker), a pun ciklus (backlog, održavanje) najviše jednom
+    u INTERVAL_MINUTES na nivou svih worker procesa.
+    """
+    global _last_full_run
+    now = time.monotonic()
+    full = _last_full_run is None or now - _last_full_run >= INTERVAL_MINUTES * 60
+    if full:
+        full = _acquire_full_run()
+        if full:
+            _last_full_run = now
+    job(full=full)
+
+
 if __name__ == "__main__":
-    logger.info(
-        "Starting NinkoSports scheduler "
-        f"(every {INTERVAL_MINUTES} minutes)..."
-    )
+    if ADAPTIVE_POLLING:
+        logger.info(
+            "Starting NinkoSports scheduler "
+            f"(adaptive polling, tick every {POLL_TICK_SECONDS}s, "
+            f"full run every {INTERVAL_MINUTES} minutes)..."
+        )
+    else:
+        logger.info(
+            "Starting NinkoSports scheduler "
+            f"(every {INTERVAL_MINUTES} minutes)..."
+        )
+
+    # nove tabele (feed_state, ...) se prave ako ne postoje
+    run_migrations()
 
     # 🔥 Odmah jedan run na startu – ne čekaš 10 minuta
     logger.info("Running initial NinkoSports job immediately on startup...")
-    job()
+    if ADAPTIVE_POLLING:
+        tick()
+    else:
+        interval_job()
 
     scheduler = BlockingScheduler()
 
-    scheduler.add_job(
-        job,
-        "interval",
-        minutes=INTERVAL_MINUTES,
-        max_instances=1,
-        coalesce=True,
-    )
+    if ADAPTIVE_POLLING:
+        scheduler.add_job(
+            tick,
+            "interval",
+            seconds=POLL_TICK_SECONDS,
+            max_instances=1,
+            coalesce=True,
+        )
+    else:
+        scheduler.add_job(
+            interval_job,
+            "interval",
+            minutes=INTERVAL_MINUTES,
+            max_instances=1,
+            coalesce=True,
+        )
 
     # this keeps the process alive
     scheduler.start()
@@ -0,0 +1,88 @@
+import calendar
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from .stream_parser import entry_key
+
+# Memorija po feed-u: heš guid/link-a poslednjih FEED_SEEN_MAX obrađenih
+# entry-ja (+ vreme objave), čuva se u feed_state. U mirnom stanju skoro
+# svaki entry je duplikat, pa se izbaci ovde, pre bilo kakvog upita u bazu.
+
+# koliko entry-ja po feed-u pamtimo (feed obično ima 20-50)
+FEED_SEEN_MAX = int(os.getenv("NEWS_FEED_SEEN_MAX", "200"))
+
+
+def _entry_hash(entry) -> Optional[str]:
+    key = entry_key(entry)
+    if not key:
+        return None
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def _entry_epoch(entry) -> int:
+    parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+    return calendar.timegm(parsed) if parsed else 0
+
+
+class SeenEntries:
+    """
+    Bounded memory of one feed's processed entries. An entry counts as
+    seen if its guid/link hash is in the window, or if it was published
+    no later than `before` (newest entry evicted from the window).
+    """
+
+    def __init__(self, raw: Optional[str] = None, before: Optional[datetime] = None):
+        self.before = before
+        self._items: List[list] = []
+        if raw:
+            try:
+                self._items = [[h, int(t)] for h, t in json.loads(raw)][:FEED_SEEN_MAX]
+            except (TypeError, ValueError):
+                self._items = []
+        self._hashes = {h for h, _ in self._items}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, entry) -> bool:
+        h = _entry_hash(entry)
+        if h is not None and h in self._hashes:
+            return True
+        if self.before is not None:
+            epoch = _entry_epoch(entry)
+            return bool(epoch) and datetime.utcfromtimestamp(epoch) <= self.before
+        return False
+
+    def add(self, entries: Iterable) -> None:
+        """
+        Remember entries (feed order, newest first). The oldest remembered
+        ones fall out of the window and move the `before` mark.
+        """
+        new = []
+        for entry in entries:
+            h = _entry_hash(entry)
+            if h is None or h in self._hashes:
+                continue
+            self._hashes.add(h)
+            new.append([h, _entry_epoch(entry)])
+
+        items = new + self._items
+        evicted = [t for _, t in items[FEED_SEEN_MAX:] if t]
+        self._items = items[:FEED_SEEN_MAX]
+        self._hashes = {h for h, _ in self._items}
+
+        if evicted:
+            # nikad iza najstarijeg zapamćenog (pogrešan datum u feed-u)
+            newest_epoch = max(evicted)
+            retained = [t for _, t in self._items if t]
+            if retained:
+                newest_epoch = min(newest_epoch, min(retained))
+            newest = datetime.utcfromtimestamp(newest_epoch)
+            if self.before is None or newest > self.before:
+                self.before = newest
+
+    def dump(self) -> str:
+        return json.dumps(self._items, separators=(",", ":"))
@@ -0,0 +1,145 @@
+import logging
+import os
+from typing import Callable, List, Optional
+
+from sqlalchemy import and_, or_, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import Article
+
+logger = logging.getLogger(__name__)
+
+# koliko puta probamo ponovo ako drugi writer "ukrade" slug (unique index)
+SLUG_RETRY_ATTEMPTS = int(os.getenv("NEWS_SLUG_RETRY_ATTEMPTS", "5"))
+
+# koliko base slug-ova ide u jedan prefix upit
+_BASES_PER_QUERY = 200
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def create_slug_index(conn: Connection) -> None:
+    """
+    Idempotent: Postgres btree index usable by LIKE 'base-%' regardless of
+    the DB collation (ix_articles_slug only serves equality there).
+    Runs in the caller's transaction (migrations.py).
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_articles_slug_pattern "
+            "ON articles (slug varchar_pattern_ops)"
+        )
+    )
+
+
+def _slug_family(dialect: str, base: str):
+    """
+    Condition for `base` and every "base-..." slug that can use an index.
+    """
+    if dialect == "postgresql":
+        # ix_articles_slug_pattern (varchar_pattern_ops)
+        return or_(
+            Article.slug == base,
+            Article.slug.like(f"{_escape_like(base)}-%", escape="\\"),
+        )
+    # SQLite ne koristi indeks za LIKE ... ESCAPE -> poluotvoren opseg
+    # [base, base + "."): slug ima samo [a-z0-9-], a "." dolazi odmah iza "-"
+    return and_(Article.slug >= base, Article.slug < f"{base}.")
+
+
+def _load_taken_slugs(
+    db: Session,
+    base_slugs: List[str],
+    skip_article_id: Optional[int] = None,
+) -> set:
+    """
+    All existing slugs that are equal to a base or start with "base-",
+    with one prefix query per _BASES_PER_QUERY bases.
+    """
+    taken = set()
+    dialect = db.get_bind().dialect.name
+    for i in range(0, len(base_slugs), _BASES_PER_QUERY):
+        conditions = [_slug_family(dialect, base) for base in base_slugs[i:i + _BASES_PER_QUERY]]
+
+        q = db.query(Article.slug).filter(or_(*conditions))
+        if skip_article_id is not None:
+            q = q.filter(Article.id != skip_article_id)
+        taken.update(s for (s,) in q.all())
+    return taken
+
+
+def reserve_unique_slugs(
+    db: Session,
+    base_slugs: List[str],
+    skip_article_id: Optional[int] = None,
+) -> List[str]:
+    """
+    Allocate one unique slug per base (base, base-2, base-3, ...),
+    also unique among themselves. Result is aligned with input.
+
+    Only reads the DB – the unique index on Article.slug is the real
+    guard, so writers should retry on IntegrityError (see
+    save_with_unique_slug).
+    """
+    taken = _load_taken_slugs(db, list(dict.fromkeys(base_slugs)), skip_article_id)
+
+    reserved: List[str] = []
+    for base in base_slugs:
+        slug = base
+        counter = 1
+        while slug in taken:
+            counter += 1
+            slug = f"{base}-{counter}"
+        taken.add(slug)
+        reserved.append(slug)
+
+    return reserved
+
+
+def allocate_unique_slug(
+    db: Session,
+    base_slug: str,
+    skip_article_id: Optional[int] = None,
+) -> str:
+    """
+    Next free slug for one base, found with a single query.
+    Can skip one article id (current article).
+    """
+    return reserve_unique_slugs(db, [base_slug], skip_article_id)[0]
+
+
+def save_with_unique_slug(
+    db: Session,
+    article: Article,
+    base_slug: str,
+    apply_changes: Optional[Callable[[], None]] = None,
+) -> None:
+    """
+    Set a unique slug on `article` and commit.
+
+    If a concurrent writer took the same slug meanwhile, the unique index
+    raises IntegrityError; we roll back, re-apply `apply_changes` (rollback
+    discards pending attribute changes) and try the next free slug.
+    """
+    for attempt in range(1, SLUG_RETRY_ATTEMPTS + 1):
+        if apply_changes:
+            apply_changes()
+        article.slug = allocate_unique_slug(db, base_slug, skip_article_id=article.id)
+        db.add(article)
+        try:
+            db.commit()
+            return
+        except IntegrityError as e:
+            db.rollback()
+            if attempt == SLUG_RETRY_ATTEMPTS:
+                raise
+            logger.warning(
+                f"[slugs] Slug conflict for '{base_slug}' "
+                f"(attempt {attempt}/{SLUG_RETRY_ATTEMPTS}): {e.orig}"
+            )
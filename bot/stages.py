@@ -0,0 +1,186 @@
+import json
+import logging
+import os
+from typing import Dict, List
+
+from sqlalchemy import select
+
+from database import SessionLocal
+from models import Article
+from .ai_budget import refund_budget, reserve_budget
+from .fetch_sources import (
+    _build_article_row,
+    _chunks,
+    _collect_feed_items,
+    _ingest_items,
+    _prepare_ai_input,
+    _rewrite_articles_with_ai,
+)
+from .work_queue import INGEST, REWRITE, claim, complete, enqueue, fail
+
+logger = logging.getLogger(__name__)
+
+# Faze bota povezane trajnim redom (bot/work_queue.py):
+#   fetch   – RSS -> normalizovani item-i, bez onih koji su već u bazi -> "ingest"
+#   ingest  – upis članaka (odmah vidljivi na sajtu) -> "rewrite"
+#   rewrite – AI rewrite po id-u članka
+# fetch radi scheduler, ingest/rewrite bot.worker (jedan ili više procesa).
+
+# koliko poslova jedna faza preuzme odjednom
+INGEST_BATCH = int(os.getenv("NEWS_QUEUE_INGEST_BATCH", "500"))
+REWRITE_BATCH = int(os.getenv("NEWS_QUEUE_REWRITE_BATCH", "20"))
+
+MAX_AI_CHARS = int(os.getenv("NEWS_MAX_AI_CHARS", "3000"))
+
+
+def _existing_external_ids(db, external_ids: List[str]) -> set:
+    existing = set()
+    for chunk in _chunks(external_ids):
+        rows = db.execute(select(Article.external_id).where(Article.external_id.in_(chunk)))
+        existing.update(row.external_id for row in rows)
+    return existing
+
+
+def fetch_stage(max_per_league: int = 5, due_only: bool = False) -> int:
+    """
+    Fetch feeds and queue items that are not in the DB yet.
+    Returns number of queued items.
+    """
+    db = SessionLocal()
+    try:
+        items, feeds = _collect_feed_items(db, max_per_league, due_only=due_only)
+
+        # normalize + dedup: samo item-i sa slikom, jednom po URL-u
+        by_url: Dict[str, Dict] = {}
+        for item in items:
+            if _build_article_row(item) is not None:
+                by_url.setdefault(item["url"], item)
+
+        existing = _existing_external_ids(db, list(by_url))
+        new_items = [(url, item) for url, item in by_url.items() if url not in existing]
+
+        enqueue(db, INGEST, new_items)
+        db.commit()
+        # red je trajan -> sve iz ovog ciklusa je zapamćeno
+        feeds.save_seen()
+        logger.info(f"[stages] Queued {len(new_items)} items for ingest")
+        return len(new_items)
+    finally:
+        db.close()
+
+
+def ingest_stage(worker_id: str) -> int:
+    """
+    Insert one batch of queued items; new articles go to the rewrite queue.
+    Returns number of processed jobs.
+    """
+    db = SessionLocal()
+    try:
+        jobs = claim(db, INGEST, INGEST_BATCH, worker_id)
+        if not jobs:
+            return 0
+
+        items = [json.loads(job.payload) for job in jobs]
+        articles = _ingest_items(db, items)
+        stored = {a.external_id for a in articles}
+
+        # ponovljen posao (npr. posle pada) samo nađe postojeće članke
+        enqueue(db, REWRITE, [(a.id, None) for a in articles if not a.ai_generated])
+
+        # _ingest_items ne baca grešku kad insert ne uspe -> item sa slikom
+        # koji nije u bazi ide nazad u red (backoff), ne briše se
+        done = []
+        for job, item in zip(jobs, items):
+            if _build_article_row(item) is not None and item.get("url") not in stored:
+                fail(db, job, "Article insert failed")
+            else:
+                done.append(job.id)
+        complete(db, done)
+        db.commit()
+        return len(jobs)
+    finally:
+        db.close()
+
+
+def rewrite_stage(worker_id: str) -> int:
+    """
+    AI-rewrite one batch of queued articles, within the per-interval AI
+    budget shared by all workers. Failed rewrites are retried later with
+    backoff. Returns number of processed jobs.
+    """
+    db = SessionLocal()
+    try:
+        # deljeni budžet po intervalu (NEWS_MAX_AI_ARTICLES), važi za sve worker-e
+        granted, window = reserve_budget(db, REWRITE_BATCH)
+        if not granted:
+            return 0
+
+        spent = 0
+        try:
+            jobs = claim(db, REWRITE, granted, worker_id)
+            if not jobs:
+                return 0
+
+            ids = [int(job.key) for job in jobs]
+            articles = {a.id: a for a in db.query(Article).filter(Article.id.in_(ids)).all()}
+            todo = [
+                articles[i]
+                for i in ids
+                if i in articles
+                and not articles[i].ai_generated
+                and _prepare_ai_input(articles[i], MAX_AI_CHARS) is not None
+            ]
+            spent = len(todo)
+
+            _rewrite_articles_with_ai(db, todo, MAX_AI_CHARS, budget=len(todo))
+
+            done = []
+            for job in jobs:
+                article = articles.get(int(job.key))
+                if (
+                    article is None
+                    or article.ai_generated
+                    or _prepare_ai_input(article, MAX_AI_CHARS) is None
+                ):
+                    done.append(job.id)
+                else:
+                    fail(db, job, "AI rewrite failed")
+            complete(db, done)
+            db.commit()
+            return len(jobs)
+        finally:
+            db.rollback()
+            refund_budget(db, granted - spent, window)
+    finally:
+        db.close()
+
+
+def enqueue_rewrite_backlog(limit: int = 500) -> int:
+    """
+    Queue older articles that still have no AI rewrite (STEP 4 of the
+    inline pipeline). Already queued ones are ignored.
+    """
+    db = SessionLocal()
+    try:
+        ids = [
+            row.id
+            for row in db.execute(
+                select(Article.id)
+                .where(Article.is_live == True)
+                .where(Article.ai_generated == False)
+                .where(Article.ai_content.is_(None))
+                .order_by(Article.created_at.desc())
+                .limit(limit)
+            )
+        ]
+        enqueue(db, REWRITE, [(article_id, None) for article_id in ids])
+        db.commit()
+        return len(ids)
+    finally:
+        db.close()
+
+
+STAGES = {
+    INGEST: ingest_stage,
+    REWRITE: rewrite_stage,
+}
@@ -0,0 +1,216 @@
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import List, Optional
+
+import feedparser
+
+# Inkrementalni RSS/Atom parser: bajtovi se "hrane" dok stižu, entry-ji se
+# prave čim se njihov element zatvori, a parsiranje staje kad imamo dovoljno
+# novih entry-ja ili naiđemo na entry poznat iz prošlog poll-a.
+# Rezultat liči na feedparser (entries sa title/link/summary/media_*), pa
+# ostatak koda ne zna koji parser je radio. Kad dokument nije čist XML
+# (HTML entiteti, čudan encoding, ...) pozivalac pada nazad na feedparser.
+
+_MEDIA_NS = ("http://search.yahoo.com/mrss/", "http://search.yahoo.com/mrss")
+_CONTENT_NS = "http://purl.org/rss/1.0/modules/content/"
+
+_ROOTS = {"rss", "feed", "RDF"}
+_ENTRY_TAGS = {"item", "entry"}
+
+
+class NotAFeed(ValueError):
+    pass
+
+
+def _split(tag: str):
+    if tag.startswith("{"):
+        ns, _, local = tag[1:].partition("}")
+        return ns, local
+    return "", tag
+
+
+def _text(elem) -> str:
+    # CDATA / tekst direktno u elementu (+ eventualni ugnježdeni tagovi)
+    if len(elem):
+        return "".join(elem.itertext()).strip()
+    return (elem.text or "").strip()
+
+
+def _parse_date(value: str) -> Optional[time.struct_time]:
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).timetuple()
+
+
+def _entry_from_element(elem) -> feedparser.FeedParserDict:
+    entry = feedparser.FeedParserDict()
+    links: List[dict] = []
+    media_content: List[dict] = []
+    media_thumbnail: List[dict] = []
+
+    for child in elem:
+        ns, local = _split(child.tag)
+
+        if ns in _MEDIA_NS:
+            if local == "content" and child.get("url"):
+                media_content.append(dict(child.attrib))
+            elif local == "thumbnail" and child.get("url"):
+                media_thumbnail.append(dict(child.attrib))
+            elif local == "group":
+                # <media:group><media:content .../></media:group>
+                for sub in child:
+                    sub_ns, sub_local = _split(sub.tag)
+                    if sub_ns in _MEDIA_NS and sub_local == "content" and sub.get("url"):
+                        media_content.append(dict(sub.attrib))
+            continue
+
+        if local == "title":
+            entry["title"] = _text(child)
+        elif local == "link":
+            href = child.get("href")
+            if href:
+                # Atom <link rel="..." href="..."/>
+                rel = child.get("rel", "alternate")
+                links.append({"rel": rel, "href": href, "type": child.get("type", "")})
+                if rel == "alternate" and "link" not in entry:
+                    entry["link"] = href
+            else:
+                entry["link"] = _text(child)
+        elif local in ("guid", "id"):
+            entry["id"] = _text(child)
+        elif local in ("description", "summary"):
+            entry["summary"] = child.text or _text(child)
+        elif (local == "encoded" and ns == _CONTENT_NS) or local == "content":
+            entry.setdefault("content", []).append({"value": child.text or _text(child)})
+        elif local == "enclosure" and child.get("url"):
+            links.append(
+                {"rel": "enclosure", "href": child.get("url"), "type": child.get("type", "")}
+            )
+        elif local in ("pubDate", "published", "issued", "date"):
+            entry["published"] = _text(child)
+            entry["published_parsed"] = _parse_date(entry["published"])
+        elif local in ("updated", "modified"):
+            entry["updated"] = _text(child)
+            entry["updated_parsed"] = _parse_date(entry["updated"])
+
+    if "link" not in entry:
+        for link in links:
+            if link["rel"] != "enclosure":
+                entry["link"] = link["href"]
+                break
+    if "summary" not in entry and entry.get("content"):
+        entry["summary"] = entry["content"][0]["value"]
+    if "summary" in entry:
+        entry["description"] = entry["summary"]
+
+    entry["links"] = links
+    if media_content:
+        entry["media_content"] = media_content
+    if media_thumbnail:
+        entry["media_thumbnail"] = media_thumbnail
+    return entry
+
+
+def entry_key(entry) -> Optional[str]:
+    """
+    Stable identity of an entry across polls (guid/id, else link).
+    """
+    return entry.get("id") or entry.get("link")
+
+
+class StreamingFeedParser:
+    """
+    Incremental parser: call feed(chunk) while downloading; `done` becomes
+    True once `limit` entries are collected or the entry with key
+    `stop_at` (newest stored entry) is reached below at least one other
+    entry. As the first entry it doesn't stop parsing, so a pinned top
+    item still yields the entries under it. close()
+    returns a feedparser-like result (feed.ttl, entries, bozo=False).
+
+    Raises ET.ParseError / NotAFeed if the document can't be handled;
+    the caller then parses the whole document with feedparser.
+    """
+
+    def __init__(self, limit: Optional[int] = None, stop_at: Optional[str] = None):
+        self.limit = limit
+        self.stop_at = stop_at
+        self.done = False
+
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._root_seen = False
+        self._entries: List[feedparser.FeedParserDict] = []
+        self._feed = feedparser.FeedParserDict()
+        self._parents: List = []
+
+    def feed(self, data: bytes) -> None:
+        if self.done:
+            return
+        self._parser.feed(data)
+        self._drain()
+
+    def _drain(self) -> None:
+        for event, elem in self._parser.read_events():
+            ns, local = _split(elem.tag)
+
+            if event == "start":
+                if not self._root_seen:
+                    self._root_seen = True
+                    if local not in _ROOTS:
+                        raise NotAFeed(f"unexpected root element <{local}>")
+                self._parents.append(elem)
+                continue
+
+            self._parents.pop()
+            parent_local = _split(self._parents[-1].tag)[1] if self._parents else ""
+
+            if local in _ENTRY_TAGS:
+                entry = _entry_from_element(elem)
+                # entry je obrađen -> oslobodi memoriju
+                elem.clear()
+                if self._parents:
+                    self._parents[-1].remove(elem)
+
+                # poznat entry je granica tek ispod bar jednog novog – na vrhu
+                # je ili "zakucan" (sticky) ili feed nema ništa novo
+                if self.stop_at and self._entries and entry_key(entry) == self.stop_at:
+                    self.done = True
+                    return
+                self._entries.append(entry)
+                if self.limit and len(self._entries) >= self.limit:
+                    self.done = True
+                    return
+
+            elif local == "skipHours":
+                hours = sorted(
+                    {int(_text(h)) for h in elem if _text(h).isdigit() and int(_text(h)) < 24}
+                )
+                self._feed["skip_hours"] = ",".join(str(h) for h in hours) or None
+            elif parent_local in ("channel", "feed") and local == "ttl":
+                self._feed["ttl"] = _text(elem)
+            elif parent_local in ("channel", "feed") and local == "title":
+                self._feed["title"] = _text(elem)
+
+    def close(self) -> feedparser.FeedParserDict:
+        if not self.done:
+            self._parser.close()
+            self._drain()
+        if not self._root_seen:
+            raise NotAFeed("empty document")
+
+        result = feedparser.FeedParserDict()
+        result["feed"] = self._feed
+        result["entries"] = self._entries
+        result["bozo"] = False
+        return result
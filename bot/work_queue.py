@@ -0,0 +1,165 @@
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from models import WorkItem
+
+logger = logging.getLogger(__name__)
+
+# Trajni red poslova između faza bota (fetch -> ingest -> rewrite).
+# Postgres: claim preko SELECT ... FOR UPDATE SKIP LOCKED, pa više worker
+# procesa deli posao bez duplikata. SQLite (lokalno): isti UPDATE je jedan
+# atomski statement (baza ionako ima samo jednog writer-a).
+
+INGEST = "ingest"
+REWRITE = "rewrite"
+
+# koliko dugo worker drži preuzet posao; posle toga ga preuzima drugi
+QUEUE_LEASE_SECONDS = int(os.getenv("NEWS_QUEUE_LEASE_SECONDS", "600"))
+
+# posle ovoliko neuspeha posao ostaje "failed" (ne pokušava se više)
+QUEUE_MAX_ATTEMPTS = int(os.getenv("NEWS_QUEUE_MAX_ATTEMPTS", "5"))
+
+# pauza pre ponovnog pokušaja: base * 2^(attempt-1), najviše max (sekunde)
+QUEUE_RETRY_BASE = float(os.getenv("NEWS_QUEUE_RETRY_BASE", "30"))
+QUEUE_RETRY_MAX = float(os.getenv("NEWS_QUEUE_RETRY_MAX", "3600"))
+
+_ENQUEUE_BATCH = 500
+
+
+def enqueue(db: Session, stage: str, items: Iterable[Tuple[str, Optional[object]]]) -> None:
+    """
+    Add (key, payload) jobs to `stage`. Keys already queued for the stage
+    are ignored. Payload is stored as JSON. Caller commits.
+    """
+    now = datetime.utcnow()
+    rows = [
+        {
+            "stage": stage,
+            "key": str(key),
+            "payload": json.dumps(payload, ensure_ascii=False) if payload is not None else None,
+            "status": "pending",
+            "attempts": 0,
+            "available_at": now,
+            "created_at": now,
+        }
+        for key, payload in items
+    ]
+    if not rows:
+        return
+
+    is_postgres = db.get_bind().dialect.name == "postgresql"
+    for i in range(0, len(rows), _ENQUEUE_BATCH):
+        chunk = rows[i:i + _ENQUEUE_BATCH]
+        if is_postgres:
+            stmt = pg_insert(WorkItem).values(chunk).on_conflict_do_nothing(
+                index_elements=["stage", "key"]
+            )
+        else:
+            stmt = insert(WorkItem).values(chunk).prefix_with("OR IGNORE")
+        db.execute(stmt)
+
+
+def claim(db: Session, stage: str, limit: int, worker_id: str) -> List:
+    """
+    Take up to `limit` jobs of `stage`: pending ones that are available and
+    running ones whose lease expired (worker died). Commits.
+    Returns rows with id, key, payload, attempts.
+    """
+    now = datetime.utcnow()
+    claimable = or_(
+        and_(WorkItem.status == "pending", WorkItem.available_at <= now),
+        and_(WorkItem.status == "running", WorkItem.locked_until < now),
+    )
+    ids = (
+        select(WorkItem.id)
+        .where(WorkItem.stage == stage, claimable)
+        .order_by(WorkItem.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    stmt = (
+        update(WorkItem)
+        .where(WorkItem.id.in_(ids))
+        .values(
+            status="running",
+            locked_by=worker_id,
+            locked_until=now + timedelta(seconds=QUEUE_LEASE_SECONDS),
+            attempts=WorkItem.attempts + 1,
+        )
+        .returning(WorkItem.id, WorkItem.key, WorkItem.payload, WorkItem.attempts)
+        .execution_options(synchronize_session=False)
+    )
+    try:
+        rows = db.execute(stmt).all()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[work_queue] Could not claim {stage} jobs: {e}")
+        return []
+    return sorted(rows, key=lambda r: r.id)
+
+
+def complete(db: Session, ids: List[int]) -> None:
+    """
+    Remove finished jobs. Caller commits.
+    """
+    if ids:
+        db.execute(
+            delete(WorkItem)
+            .where(WorkItem.id.in_(ids))
+            .execution_options(synchronize_session=False)
+        )
+
+
+def fail(db: Session, job, error: str) -> None:
+    """
+    Put a job back with exponential backoff, or mark it failed after
+    QUEUE_MAX_ATTEMPTS. Caller commits.
+    """
+    if job.attempts >= QUEUE_MAX_ATTEMPTS:
+        values = {"status": "failed"}
+        logger.error(f"[work_queue] Job {job.id} ({job.key}) failed permanently: {error}")
+    else:
+        delay = min(QUEUE_RETRY_MAX, QUEUE_RETRY_BASE * 2 ** (job.attempts - 1))
+        values = {
+            "status": "pending",
+            "available_at": datetime.utcnow() + timedelta(seconds=delay),
+        }
+    values.update({"locked_by": None, "locked_until": None, "last_error": error[:2000]})
+
+    db.execute(
+        update(WorkItem)
+        .where(WorkItem.id == job.id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def queued_keys(db: Session, stage: str) -> set:
+    """
+    Keys of jobs of `stage` that are not finished yet (pending / running).
+    """
+    rows = db.execute(
+        select(WorkItem.key).where(
+            WorkItem.stage == stage, WorkItem.status.in_(("pending", "running"))
+        )
+    )
+    return {row.key for row in rows}
+
+
+def queue_stats(db: Session) -> Dict[str, Dict[str, int]]:
+    rows = db.execute(
+        select(WorkItem.stage, WorkItem.status, func.count())
+        .group_by(WorkItem.stage, WorkItem.status)
+    ).all()
+    stats: Dict[str, Dict[str, int]] = {}
+    for stage, status, count in rows:
+        stats.setdefault(stage, {})[status] = count
+    return stats
@@ -0,0 +1,65 @@
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+
+from migrations import run_migrations
+from .stages import STAGES
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Worker za faze iz reda poslova (bot/stages.py):
+#   python -m bot.worker ingest,rewrite
+# Svaka faza ima svoj thread; za više kapaciteta pokreni više procesa
+# (Postgres SKIP LOCKED deli poslove između njih).
+
+# pauza kad faza nema posla (sekunde)
+QUEUE_IDLE_SECONDS = float(os.getenv("NEWS_QUEUE_IDLE_SECONDS", "2"))
+
+
+def _run_stage(name: str, stop: threading.Event) -> None:
+    handler = STAGES[name]
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{name}"
+    logger.info(f"[worker] Stage {name} started ({worker_id})")
+
+    while not stop.is_set():
+        try:
+            processed = handler(worker_id)
+        except Exception as e:
+            logger.exception(f"[worker] Stage {name} failed: {e}")
+            processed = 0
+        if not processed:
+            stop.wait(QUEUE_IDLE_SECONDS)
+
+    logger.info(f"[worker] Stage {name} stopped")
+
+
+def main(stage_names) -> None:
+    unknown = [name for name in stage_names if name not in STAGES]
+    if unknown:
+        raise SystemExit(f"Unknown stage(s): {', '.join(unknown)} (known: {', '.join(STAGES)})")
+
+    run_migrations()
+
+    stop = threading.Event()
+    # Heroku šalje SIGTERM pre gašenja -> završi tekući batch i izađi
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    threads = [
+        threading.Thread(target=_run_stage, args=(name, stop), name=f"stage-{name}")
+        for name in stage_names
+    ]
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        for thread in threads:
+            thread.join(timeout=1)
+
+
+if __name__ == "__main__":
+    arg = sys.argv[1] if len(sys.argv) > 1 else ",".join(STAGES)
+    main([name.strip() for name in arg.split(",") if name.strip()])
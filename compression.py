@@ -0,0 +1,126 @@
+import gzip
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Kompresija JSON odgovora (gzip / brotli) po Accept-Encoding header-u.
+# Tela odgovora su već gotovi bajtovi (keš odgovora, meta rute), pa se
+# kompresovana verzija pravi jednom po telu i čuva uz njega.
+
+try:
+    import brotli
+except ImportError:  # brotli je opcion – bez njega samo gzip
+    brotli = None
+
+# redosled = prioritet kad klijent podržava više (npr. "br,gzip"); "" = isključeno
+RESPONSE_COMPRESSION = os.getenv("RESPONSE_COMPRESSION", "br,gzip")
+
+# manja tela se šalju nekompresovana (header + CPU ne isplate se)
+RESPONSE_COMPRESSION_MIN_SIZE = int(os.getenv("RESPONSE_COMPRESSION_MIN_SIZE", "1024"))
+
+# nivoi za kompresiju "u letu" (keš odgovora) i za statične odgovore pri startu
+GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "5"))
+STATIC_GZIP_LEVEL = 9
+STATIC_BROTLI_QUALITY = 11
+
+
+def _enabled_encodings() -> Tuple[str, ...]:
+    encodings = []
+    for name in RESPONSE_COMPRESSION.split(","):
+        name = name.strip().lower()
+        if name == "br" and brotli is None:
+            logger.warning("[compression] brotli is not installed, using gzip only")
+            continue
+        if name in ("br", "gzip") and name not in encodings:
+            encodings.append(name)
+    return tuple(encodings)
+
+
+ENCODINGS = _enabled_encodings()
+
+
+def _accepted(accept_encoding: Optional[str]) -> Dict[str, float]:
+    """
+    Parse Accept-Encoding into {coding: q}.
+    """
+    accepted: Dict[str, float] = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Best enabled encoding the client accepts (highest q, ties by
+    RESPONSE_COMPRESSION order), or None for identity.
+    """
+    accepted = _accepted(accept_encoding)
+    best, best_q = None, 0.0
+    for name in ENCODINGS:
+        q = accepted.get(name, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def compress(body: bytes, encoding: str, static: bool = False) -> bytes:
+    if encoding == "br":
+        quality = STATIC_BROTLI_QUALITY if static else BROTLI_QUALITY
+        return brotli.compress(body, quality=quality)
+    level = STATIC_GZIP_LEVEL if static else GZIP_LEVEL
+    # mtime=0 -> isti ulaz daje iste bajtove na svim procesima
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def should_compress(body: bytes) -> bool:
+    return bool(ENCODINGS) and len(body) >= RESPONSE_COMPRESSION_MIN_SIZE
+
+
+def precompress(body: bytes) -> Dict[str, bytes]:
+    """
+    All enabled variants of a static body, at max compression level.
+    """
+    if not should_compress(body):
+        return {}
+    return {name: compress(body, name, static=True) for name in ENCODINGS}
+
+
+def encode_body(
+    body: bytes,
+    accept_encoding: Optional[str],
+    variants: Optional[Dict[str, bytes]] = None,
+) -> Tuple[bytes, Optional[str]]:
+    """
+    Return (bytes to send, Content-Encoding or None). Compressed bodies are
+    memoized in `variants` (e.g. the response cache entry) so each body
+    is compressed at most once per encoding.
+    """
+    if not should_compress(body):
+        return body, None
+
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        return body, None
+
+    if variants is None:
+        return compress(body, encoding), encoding
+
+    encoded = variants.get(encoding)
+    if encoded is None:
+        encoded = compress(body, encoding)
+        variants[encoding] = encoded
+    return encoded, encoding
@@ -0,0 +1,56 @@
+import logging
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import ContentVersion
+
+logger = logging.getLogger(__name__)
+
+ARTICLES = "articles"
+
+
+def bump_content_version(db: Session, name: str = ARTICLES) -> None:
+    """
+    Increment the version after new/rewritten articles were committed.
+    Readers (app.py response cache) drop cached responses when it changes.
+    """
+    try:
+        updated = (
+            db.query(ContentVersion)
+            .filter(ContentVersion.name == name)
+            .update(
+                {
+                    ContentVersion.version: ContentVersion.version + 1,
+                    ContentVersion.updated_at: datetime.utcnow(),
+                },
+                synchronize_session=False,
+            )
+        )
+        if not updated:
+            db.add(ContentVersion(name=name, version=1, updated_at=datetime.utcnow()))
+        db.commit()
+    except IntegrityError:
+        # drugi proces je upravo napravio red – dovoljno je da verzija postoji
+        db.rollback()
+        bump_content_version(db, name)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[content_version] Could not bump {name}: {e}")
+
+
+def read_content_version(db: Session, name: str = ARTICLES) -> int:
+    row = db.get(ContentVersion, name)
+    return row.version if row else 0
+
+
+async def aread_content_version(db, name: str = ARTICLES) -> int:
+    """
+    Same as read_content_version for an AsyncSession (FastAPI app).
+    """
+    result = await db.execute(
+        select(ContentVersion.version).where(ContentVersion.name == name)
+    )
+    return result.scalar() or 0
@@ -1,11 +1,224 @@
 import os
+import threading
+import time
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is not set")
 
-engine = create_engine(DATABASE_URL)
+
+# ---------- Pool podešavanja po ulozi procesa ----------
+# web i worker dyno otvaraju pool ka istom Postgres-u, pa svaki ima svoje
+# default-e; sve se može pregaziti env promenljivama.
+DB_ROLE = os.getenv("DB_ROLE", "worker")
+
+_ROLE_DEFAULTS = {
+    # web: sync engine skoro ne koristi (API ide preko async engine-a),
+    # kratki statement timeout da spori upiti ne blokiraju pool
+    "web": {
+        "pool_size": 2,
+        "max_overflow": 2,
+        "async_pool_size": 10,
+        "async_max_overflow": 10,
+        "statement_timeout_ms": 5000,
+    },
+    # worker: AI workeri + glavni thread, duži batch upiti
+    "worker": {
+        "pool_size": 5,
+        "max_overflow": 5,
+        "async_pool_size": 2,
+        "async_max_overflow": 0,
+        "statement_timeout_ms": 60000,
+    },
+}
+
+_defaults = _ROLE_DEFAULTS.get(DB_ROLE, _ROLE_DEFAULTS["worker"])
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", _defaults["pool_size"]))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", _defaults["max_overflow"]))
+DB_ASYNC_POOL_SIZE = int(os.getenv("DB_ASYNC_POOL_SIZE", _defaults["async_pool_size"]))
+DB_ASYNC_MAX_OVERFLOW = int(os.getenv("DB_ASYNC_MAX_OVERFLOW", _defaults["async_max_overflow"]))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+DB_STATEMENT_TIMEOUT_MS = int(
+    os.getenv("DB_STATEMENT_TIMEOUT_MS", _defaults["statement_timeout_ms"])
+)
+
+
+# ---------- Pool metrike ----------
+
+class _TimedPoolMixin:
+    """
+    Counts checkouts and time spent waiting for a free pool slot.
+    Opening a new connection (DNS/TLS/auth) and pre-ping are not counted,
+    so the wait reflects pool pressure only.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_stats = {"lock": threading.Lock(), "checkouts": 0, "wait_total": 0.0, "wait_max": 0.0}
+        self._wait_local = threading.local()
+
+    def _create_connection(self):
+        started = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            local = self._wait_local
+            local.connecting = getattr(local, "connecting", 0.0) + time.perf_counter() - started
+
+    def _do_get(self):
+        # _do_get = čekanje na slobodan slot (+ otvaranje nove konekcije,
+        # koje se oduzima preko _create_connection)
+        local = self._wait_local
+        local.connecting = 0.0
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = max(0.0, time.perf_counter() - started - local.connecting)
+            stats = self._wait_stats
+            with stats["lock"]:
+                stats["checkouts"] += 1
+                stats["wait_total"] += waited
+                stats["wait_max"] = max(stats["wait_max"], waited)
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _pool_stats(pool) -> dict:
+    stats = getattr(pool, "_wait_stats", None) or {}
+    checkouts = stats.get("checkouts", 0)
+    result = {
+        "checkouts": checkouts,
+        "wait_avg_ms": round(1000 * stats.get("wait_total", 0.0) / checkouts, 2) if checkouts else 0.0,
+        "wait_max_ms": round(1000 * stats.get("wait_max", 0.0), 2),
+    }
+    if isinstance(pool, QueuePool):
+        result.update(
+            {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(0, pool.overflow()),
+                "idle": pool.checkedin(),
+            }
+        )
+    return result
+
+
+def pool_metrics() -> dict:
+    """
+    Pool usage of this process (sync engine + async engine if created).
+    """
+    metrics = {"role": DB_ROLE, "sync": _pool_stats(engine.pool)}
+    if _async_engine is not None:
+        metrics["async"] = _pool_stats(_async_engine.pool)
+    return metrics
+
+
+def _engine_kwargs(url, pool_size: int, max_overflow: int, poolclass, is_async: bool) -> dict:
+    """
+    Pool + statement timeout arguments for create_engine /
+    create_async_engine. SQLite (local) keeps SQLAlchemy defaults.
+    """
+    if not url.get_backend_name().startswith("postgres"):
+        return {}
+
+    if is_async:
+        # asyncpg: server_settings se šalju pri otvaranju konekcije
+        connect_args = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+    else:
+        connect_args = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+
+    return {
+        "poolclass": poolclass,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
+
+
+engine = create_engine(
+    DATABASE_URL,
+    **_engine_kwargs(make_url(DATABASE_URL), DB_POOL_SIZE, DB_MAX_OVERFLOW, TimedQueuePool, False),
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+# ---------- Async engine (FastAPI app) ----------
+# Bot koristi sync engine iznad; web app koristi asyncpg (ili aiosqlite lokalno),
+# pa request ne drži thread iz threadpool-a dok čeka bazu.
+
+_ASYNC_DRIVERS = {
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def _async_url(url: str):
+    """
+    Convert DATABASE_URL to an async driver URL.
+    asyncpg doesn't understand ?sslmode=..., so it's moved to connect_args.
+    Returns (url, connect_args).
+    """
+    u = make_url(url)
+    u = u.set(drivername=_ASYNC_DRIVERS.get(u.drivername, u.drivername))
+
+    connect_args = {}
+    if u.drivername == "postgresql+asyncpg" and "sslmode" in u.query:
+        connect_args["ssl"] = u.query["sslmode"]
+        u = u.difference_update_query(["sslmode"])
+
+    return u, connect_args
+
+
+_async_engine = None
+_async_sessionmaker = None
+
+
+def get_async_engine():
+    """
+    Lazily created so the bot (sync only) doesn't need async drivers.
+    """
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        url, connect_args = _async_url(DATABASE_URL)
+        kwargs = _engine_kwargs(
+            url, DB_ASYNC_POOL_SIZE, DB_ASYNC_MAX_OVERFLOW, TimedAsyncQueuePool, True
+        )
+        kwargs["connect_args"] = {**kwargs.get("connect_args", {}), **connect_args}
+        _async_engine = create_async_engine(url, **kwargs)
+    return _async_engine
+
+
+def AsyncSessionLocal():
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        _async_sessionmaker = async_sessionmaker(
+            bind=get_async_engine(),
+            autoflush=False,
+            expire_on_commit=False,
+        )
+    return _async_sessionmaker()
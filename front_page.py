@@ -0,0 +1,153 @@
+import hashlib
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import Select, select, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from content_version import bump_content_version
+from models import LIST_COLUMNS, Article, FrontPageSnapshot
+from serialization import dumps_json
+
+logger = logging.getLogger(__name__)
+
+# "Naslovna": poslednjih N članaka po ligi i po sportu u jednom JSON-u.
+# Worker ga pravi posle svakog ciklusa i čuva u front_page_snapshot, web
+# ga servira kao gotove bajtove (jedan red iz baze umesto upita po ligi).
+
+FRONT_PAGE_PER_LEAGUE = int(os.getenv("FRONT_PAGE_PER_LEAGUE", "10"))
+FRONT_PAGE_PER_SPORT = int(os.getenv("FRONT_PAGE_PER_SPORT", "10"))
+
+SNAPSHOT_NAME = "front-page"
+
+
+def _latest_per(column, values: List[str], limit: int) -> Optional[Select]:
+    """
+    UNION ALL of one "latest `limit` rows WHERE column = value" per value.
+    Every branch is a short backward scan of the (column, created_at, id)
+    index, so cost doesn't grow with the table.
+    """
+    parts = []
+    for value in values:
+        sub = (
+            select(*LIST_COLUMNS)
+            .where(column == value)
+            .order_by(Article.created_at.desc(), Article.id.desc())
+            .limit(limit)
+            .subquery()
+        )
+        parts.append(select(sub))
+    if not parts:
+        return None
+    return union_all(*parts)
+
+
+def _group(rows, key: str, values: List[str]) -> Dict[str, List[dict]]:
+    grouped: Dict[str, List[dict]] = {value: [] for value in values}
+    for row in rows:
+        item = dict(row._mapping)
+        grouped[item[key]].append(item)
+    for items in grouped.values():
+        items.sort(key=lambda a: (a["created_at"] or datetime.min, a["id"]), reverse=True)
+    return grouped
+
+
+def _queries(leagues: Iterable[str], sports: Iterable[str]):
+    leagues = list(dict.fromkeys(leagues))
+    sports = list(dict.fromkeys(sports))
+    return (
+        leagues,
+        sports,
+        _latest_per(Article.league, leagues, FRONT_PAGE_PER_LEAGUE),
+        _latest_per(Article.sport, sports, FRONT_PAGE_PER_SPORT),
+    )
+
+
+def _payload(leagues, sports, league_rows, sport_rows) -> dict:
+    return {
+        "generated_at": datetime.utcnow(),
+        "leagues": _group(league_rows, "league", leagues),
+        "sports": _group(sport_rows, "sport", sports),
+    }
+
+
+def dumps_front_page(payload: dict) -> bytes:
+    return dumps_json(payload)
+
+
+def build_front_page(db: Session, leagues: Iterable[str], sports: Iterable[str]) -> dict:
+    leagues, sports, league_q, sport_q = _queries(leagues, sports)
+    league_rows = db.execute(league_q).all() if league_q is not None else []
+    sport_rows = db.execute(sport_q).all() if sport_q is not None else []
+    return _payload(leagues, sports, league_rows, sport_rows)
+
+
+async def abuild_front_page(db, leagues: Iterable[str], sports: Iterable[str]) -> dict:
+    """
+    Same as build_front_page for an AsyncSession (fallback in app.py when
+    the worker hasn't written a snapshot yet).
+    """
+    leagues, sports, league_q, sport_q = _queries(leagues, sports)
+    league_rows = (await db.execute(league_q)).all() if league_q is not None else []
+    sport_rows = (await db.execute(sport_q)).all() if sport_q is not None else []
+    return _payload(leagues, sports, league_rows, sport_rows)
+
+
+def _content_hash(payload: dict) -> str:
+    content = {key: value for key, value in payload.items() if key != "generated_at"}
+    return hashlib.sha256(dumps_json(content)).hexdigest()
+
+
+def save_front_page(db: Session, leagues: Iterable[str], sports: Iterable[str]) -> bool:
+    """
+    Rebuild the snapshot and store it if the league/sport lists changed;
+    only then bump content_version so web processes drop the cached copy.
+    Returns True if a new snapshot was saved.
+    """
+    payload = b""
+    for attempt in range(2):
+        try:
+            data = build_front_page(db, leagues, sports)
+            content_hash = _content_hash(data)
+            current = db.get(FrontPageSnapshot, SNAPSHOT_NAME)
+            if current is not None and current.content_hash == content_hash:
+                # isti članci -> ne diraj snapshot ni keš web procesa
+                db.rollback()
+                return False
+
+            payload = dumps_front_page(data)
+            db.merge(
+                FrontPageSnapshot(
+                    name=SNAPSHOT_NAME,
+                    payload=payload.decode("utf-8"),
+                    built_at=datetime.utcnow(),
+                    content_hash=content_hash,
+                )
+            )
+            db.commit()
+            break
+        except IntegrityError:
+            # drugi worker je istovremeno napravio red -> sledeći put je UPDATE
+            db.rollback()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"[front_page] Could not save snapshot: {e}")
+            return False
+    else:
+        logger.error("[front_page] Could not save snapshot: concurrent writers")
+        return False
+
+    bump_content_version(db)
+    logger.info(f"[front_page] Saved snapshot ({len(payload)} bytes)")
+    return True
+
+
+async def aload_front_page(db) -> Optional[bytes]:
+    result = await db.execute(
+        select(FrontPageSnapshot.payload).where(FrontPageSnapshot.name == SNAPSHOT_NAME)
+    )
+    payload = result.scalar()
+    return payload.encode("utf-8") if payload else None
@@ -0,0 +1,77 @@
+import logging
+from contextlib import contextmanager
+
+from sqlalchemy import inspect, text
+
+from database import engine
+from models import Base
+from bot.slugs import create_slug_index
+from search import create_search_index
+
+logger = logging.getLogger(__name__)
+
+
+def run_migrations():
+    """
+    Idempotent schema setup, safe to run on every process start.
+    Creates tables that don't exist yet, and nullable columns and indexes
+    that were added to models after the table was created (create_all
+    skips those), plus the full-text search index (see search.py) and the
+    Postgres slug prefix index (see bot/slugs.py).
+    """
+    with _ddl_transaction() as conn:
+        Base.metadata.create_all(bind=conn)
+    _add_missing_columns()
+    _create_missing_indexes()
+    with _ddl_transaction() as conn:
+        create_slug_index(conn)
+    with _ddl_transaction() as conn:
+        create_search_index(conn)
+    logger.info("[migrations] Schema is up to date")
+
+
+@contextmanager
+def _ddl_transaction():
+    """
+    Transaction for migration DDL without the role's statement_timeout
+    (database.py): on a big table a column rewrite or an index build takes
+    much longer than that, and the process would fail on every start.
+    """
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SET LOCAL statement_timeout = 0"))
+        yield conn
+
+
+def _add_missing_columns():
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+
+    for table in Base.metadata.sorted_tables:
+        existing = {col["name"] for col in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            # nove kolone moraju biti nullable (postojeći redovi nemaju vrednost)
+            col_type = column.type.compile(dialect=engine.dialect)
+            logger.info(f"[migrations] Adding column {table.name}.{column.name}")
+            with _ddl_transaction() as conn:
+                conn.execute(
+                    text(
+                        f"ALTER TABLE {preparer.format_table(table)} "
+                        f"ADD COLUMN {preparer.format_column(column)} {col_type}"
+                    )
+                )
+
+
+def _create_missing_indexes():
+    inspector = inspect(engine)
+
+    for table in Base.metadata.sorted_tables:
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            logger.info(f"[migrations] Creating index {index.name} on {table.name}")
+            with _ddl_transaction() as conn:
+                index.create(bind=conn, checkfirst=True)
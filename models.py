@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Index, UniqueConstraint
 from sqlalchemy.orm import declarative_base
 from datetime import datetime
 
@@ -34,3 +34,185 @@ class Article(Base):
     is_live = Column(Boolean, default=True)
 
     created_at = Column(DateTime, default=datetime.utcnow)
+
+    # liste na sajtu: filter po sport/league/country, sort po created_at (+ id
+    # kao tie-break za keyset paginaciju). Backward scan pokriva i "newest".
+    __table_args__ = (
+        Index("ix_articles_created_at_id", "created_at", "id"),
+        Index("ix_articles_league_created_at_id", "league", "created_at", "id"),
+        Index("ix_articles_sport_created_at_id", "sport", "created_at", "id"),
+        Index("ix_articles_country_created_at_id", "country", "created_at", "id"),
+    )
+
+
+# kolone za liste članaka (API liste, pretraga, naslovna) – bez teksta članka
+LIST_COLUMNS = (
+    Article.id,
+    Article.title,
+    Article.slug,
+    Article.sport,
+    Article.league,
+    Article.country,
+    Article.division,
+    Article.image_url,
+    Article.source_url,
+    Article.summary,
+    Article.created_at,
+)
+
+
+class FeedState(Base):
+    """
+    Stanje jednog RSS feed-a između run-ova (za conditional GET).
+    """
+    __tablename__ = "feed_state"
+
+    url = Column(String(500), primary_key=True)
+
+    etag = Column(String(300), nullable=True)
+    last_modified = Column(String(100), nullable=True)
+
+    # HTTP status poslednjeg pokušaja (0 = mrežna greška)
+    last_status = Column(Integer, nullable=True)
+    last_fetched_at = Column(DateTime, nullable=True)
+
+    # adaptivno osvežavanje (bot/poll_schedule.py), intervali u sekundama
+    next_poll_at = Column(DateTime, nullable=True, index=True)
+    poll_interval = Column(Integer, nullable=True)
+    publish_interval = Column(Integer, nullable=True)
+    last_entry_at = Column(DateTime, nullable=True)
+
+    # guid/link najnovijeg entry-ja (parser staje kad naiđe na njega)
+    last_entry_id = Column(String(500), nullable=True)
+
+    # već obrađeni entry-ji (bot/seen_entries.py): JSON [[hash, epoch], ...]
+    # + vreme objave najnovijeg izbačenog iz tog prozora
+    seen_entries = Column(Text, nullable=True)
+    seen_before = Column(DateTime, nullable=True)
+
+    # hintovi iz samog RSS-a
+    ttl_minutes = Column(Integer, nullable=True)
+    skip_hours = Column(String(100), nullable=True)
+
+    # koji worker trenutno povlači feed (više worker procesa, bot/leases.py)
+    locked_by = Column(String(100), nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+
+
+class AIRewriteCache(Base):
+    """
+    Keš AI rewrite rezultata (isti tekst -> ne plaćamo OpenAI dvaput).
+    Ključ je hash (model, verzija prompta, naslov, tekst).
+    """
+    __tablename__ = "ai_rewrite_cache"
+
+    key = Column(String(64), primary_key=True)
+    model = Column(String(100))
+    output = Column(Text)
+
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class AIBatchJob(Base):
+    """
+    Jedan OpenAI Batch API posao za stare članke (backlog rewrite).
+    """
+    __tablename__ = "ai_batch_jobs"
+
+    batch_id = Column(String(100), primary_key=True)
+
+    # OpenAI status (validating, in_progress, completed, ...) ili "applied"
+    status = Column(String(30), index=True)
+
+    input_file_id = Column(String(100))
+    output_file_id = Column(String(100), nullable=True)
+
+    # JSON lista [article_id, cache_key]
+    items = Column(Text)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class ContentVersion(Base):
+    """
+    Brojač verzije podataka; worker ga povećava posle svakog upisa članaka,
+    web proces po njemu zna kad da obriše keš odgovora.
+    """
+    __tablename__ = "content_version"
+
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class FrontPageSnapshot(Base):
+    """
+    Gotov JSON naslovne (poslednji članci po ligi/sportu), pravi ga worker.
+    """
+    __tablename__ = "front_page_snapshot"
+
+    name = Column(String(50), primary_key=True)
+    payload = Column(Text)
+    built_at = Column(DateTime, default=datetime.utcnow)
+
+    # sha256 sadržaja (lige/sportovi, bez generated_at) -> bump samo kad se promeni
+    content_hash = Column(String(64), nullable=True)
+
+
+class WorkItem(Base):
+    """
+    Jedan posao u trajnom redu između faza bota (bot/work_queue.py):
+    ingest (normalizovan RSS item) ili rewrite (id članka).
+    """
+    __tablename__ = "work_items"
+
+    id = Column(Integer, primary_key=True)
+
+    stage = Column(String(30), nullable=False)
+    # jedinstven po fazi (external_id / id članka) -> isti posao se ne duplira
+    key = Column(String(500), nullable=False)
+    payload = Column(Text, nullable=True)
+
+    # pending -> running -> (obrisan kad je gotov) ili failed posle max pokušaja
+    status = Column(String(20), default="pending", nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    available_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # ko drži posao i do kada; posle isteka ga preuzima drugi worker
+    locked_by = Column(String(100), nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("stage", "key", name="uq_work_items_stage_key"),
+        Index("ix_work_items_claim", "stage", "status", "available_at"),
+    )
+
+
+class Budget(Base):
+    """
+    Zajednički brojač po vremenskom prozoru za sve worker procese (npr. AI
+    rewrite-ovi po intervalu, bot/ai_budget.py).
+    """
+    __tablename__ = "budgets"
+
+    name = Column(String(100), primary_key=True)
+    window_start = Column(DateTime, nullable=False)
+    used = Column(Integer, nullable=False, default=0)
+
+
+class Lease(Base):
+    """
+    Imenovani lease (npr. "full-run") – samo jedan worker proces ga drži
+    do expires_at, posle toga ga preuzima drugi.
+    """
+    __tablename__ = "leases"
+
+    name = Column(String(100), primary_key=True)
+    owner = Column(String(100), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    acquired_at = Column(DateTime, default=datetime.utcnow)
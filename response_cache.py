@@ -0,0 +1,126 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+def make_etag(body: bytes) -> str:
+    # strong ETag = hash sadržaja (isti bajtovi -> isti ETag na svim procesima)
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+class CachedResponse:
+    __slots__ = ("body", "headers", "etag", "expires_at", "variants")
+
+    def __init__(self, body: bytes, headers: Dict[str, str], expires_at: float):
+        self.body = body
+        self.headers = headers
+        self.etag = make_etag(body)
+        self.expires_at = expires_at
+        # kompresovane verzije tela (encoding -> bytes), pune se po potrebi
+        self.variants: Dict[str, bytes] = {}
+
+
+class ResponseCache:
+    """
+    In-process TTL + LRU cache of pre-serialized JSON responses.
+
+    Entries are also dropped as a whole when the data version changes.
+    The caller reads the version (one cheap primary-key read) only when
+    version_check_due() says so – at most every `version_check_seconds` –
+    and reports it with set_version(), so hot routes don't hit the DB.
+    A response built from data read under one version is not stored if
+    the version changed meanwhile (see set()).
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        version_check_seconds: float,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version_check_seconds = version_check_seconds
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._version: Optional[int] = None
+        self._version_checked_at = 0.0
+
+        self.hits = 0
+        self.misses = 0
+
+    def version_check_due(self) -> bool:
+        """
+        True at most once per version_check_seconds (the caller that gets
+        True is expected to call set_version).
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now - self._version_checked_at < self.version_check_seconds:
+                return False
+            self._version_checked_at = now
+            return True
+
+    def set_version(self, version: Optional[int]) -> None:
+        with self._lock:
+            # None = ne znamo verziju (npr. tabela još ne postoji) -> ne keširamo
+            if version is None or version != self._version:
+                self._entries.clear()
+            self._version = version
+
+    @property
+    def version(self) -> Optional[int]:
+        with self._lock:
+            return self._version
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        if self.max_entries <= 0:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(
+        self, key: str, body: bytes, headers: Dict[str, str], version: Optional[int]
+    ) -> CachedResponse:
+        """
+        Cache a response built from data loaded under `version` (read with
+        .version before loading). If the version has changed since, the
+        body may be stale and is only returned, not stored.
+        """
+        entry = CachedResponse(body, headers, time.monotonic() + self.ttl_seconds)
+        if self.max_entries <= 0:
+            return entry
+
+        with self._lock:
+            if self._version is None or version != self._version:
+                return entry
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "version": self._version,
+            }
@@ -0,0 +1,130 @@
+import logging
+import os
+import re
+from typing import Optional, Tuple
+
+from sqlalchemy import Select, column, func, literal_column, select, table, text, tuple_
+from sqlalchemy.engine import Connection
+
+from models import Article
+
+logger = logging.getLogger(__name__)
+
+# Full-text pretraga članaka (title + summary + ai_content).
+#
+# Postgres: generisana tsvector kolona articles.search_vector + GIN indeks.
+# Kolonu računa sama baza pri svakom INSERT/UPDATE-u, pa je ažurna i za
+# bulk insert iz fetch_sources, pipeline.py, AI rewrite i batch rewrite.
+#
+# SQLite (lokalno): FTS5 tabela articles_fts (external content) koju
+# održavaju trigeri na articles.
+
+# text search konfiguracija (AI tekst je na engleskom)
+SEARCH_TS_CONFIG = os.getenv("SEARCH_TS_CONFIG", "english")
+
+if not re.fullmatch(r"[a-z_]+", SEARCH_TS_CONFIG):
+    raise ValueError(f"Invalid SEARCH_TS_CONFIG: {SEARCH_TS_CONFIG!r}")
+
+
+# ---------- Postgres ----------
+
+_PG_VECTOR = (
+    f"setweight(to_tsvector('{SEARCH_TS_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_TS_CONFIG}', coalesce(summary, '')), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_TS_CONFIG}', coalesce(ai_content, '')), 'C')"
+)
+
+_PG_DDL = (
+    "ALTER TABLE articles ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS ({_PG_VECTOR}) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_articles_search_vector "
+    "ON articles USING gin (search_vector)",
+)
+
+
+# ---------- SQLite FTS5 ----------
+
+_SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5("
+    "title, summary, ai_content, content='articles', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN "
+    "INSERT INTO articles_fts(rowid, title, summary, ai_content) "
+    "VALUES (new.id, new.title, new.summary, new.ai_content); END",
+    "CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN "
+    "INSERT INTO articles_fts(articles_fts, rowid, title, summary, ai_content) "
+    "VALUES ('delete', old.id, old.title, old.summary, old.ai_content); END",
+    "CREATE TRIGGER IF NOT EXISTS articles_fts_update "
+    "AFTER UPDATE OF title, summary, ai_content ON articles BEGIN "
+    "INSERT INTO articles_fts(articles_fts, rowid, title, summary, ai_content) "
+    "VALUES ('delete', old.id, old.title, old.summary, old.ai_content); "
+    "INSERT INTO articles_fts(rowid, title, summary, ai_content) "
+    "VALUES (new.id, new.title, new.summary, new.ai_content); END",
+)
+
+_fts = table("articles_fts", column("rowid"))
+
+
+def create_search_index(conn: Connection) -> None:
+    """
+    Idempotent: adds the search column/index (Postgres) or the FTS5 table
+    and triggers (SQLite). Existing rows are indexed on first run.
+    Runs in the caller's transaction (migrations.py).
+    """
+    dialect = conn.dialect.name
+
+    if dialect == "postgresql":
+        for ddl in _PG_DDL:
+            conn.execute(text(ddl))
+    elif dialect == "sqlite":
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = 'articles_fts'")
+        ).first()
+        for ddl in _SQLITE_DDL:
+            conn.execute(text(ddl))
+        if not exists:
+            logger.info("[search] Building articles_fts from existing rows")
+            conn.execute(text("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')"))
+    else:
+        logger.warning(f"[search] Full-text search not supported on {dialect}")
+
+
+def _fts5_match(q: str) -> Optional[str]:
+    # svaka reč kao "fraza" -> korisnički unos ne može da razbije FTS5 sintaksu
+    words = re.findall(r"\w+", q)
+    if not words:
+        return None
+    return " ".join(f'"{w}"' for w in words)
+
+
+def search_query(
+    dialect: str,
+    q: str,
+    columns,
+    after: Optional[Tuple[float, int]] = None,
+) -> Optional[Select]:
+    """
+    SELECT `columns` + "rank" for articles matching `q`, best match first
+    (rank desc, id desc). `after` = (rank, id) of the last row of the
+    previous page. Returns None if `q` can't match anything.
+    """
+    if dialect == "postgresql":
+        tsquery = func.websearch_to_tsquery(literal_column(f"'{SEARCH_TS_CONFIG}'"), q)
+        vector = literal_column("articles.search_vector")
+        rank = func.ts_rank_cd(vector, tsquery)
+        query = select(*columns, rank.label("rank")).where(vector.op("@@")(tsquery))
+    else:
+        match = _fts5_match(q)
+        if match is None:
+            return None
+        # bm25: manji = bolji; title > summary > ai_content
+        rank = -func.bm25(literal_column("articles_fts"), 10.0, 4.0, 1.0)
+        query = (
+            select(*columns, rank.label("rank"))
+            .join(_fts, _fts.c.rowid == Article.id)
+            .where(literal_column("articles_fts").op("MATCH")(match))
+        )
+
+    if after is not None:
+        query = query.where(tuple_(rank, Article.id) < tuple_(*after))
+
+    return query.order_by(rank.desc(), Article.id.desc())
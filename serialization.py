@@ -0,0 +1,29 @@
+import json
+from datetime import date, datetime
+from typing import Any
+
+# Brza JSON serijalizacija za API odgovore i snapshot-e.
+# Redovi iz baze su već "čisti" (str/int/datetime), pa nema potrebe za
+# Pydantic validacijom ni jsonable_encoder-om; orjson datetime piše sam.
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson je u requirements.txt
+    orjson = None
+
+
+def _default(obj: Any):
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_json(data: Any) -> bytes:
+    """
+    Serialize to compact UTF-8 JSON bytes (datetimes as ISO 8601).
+    """
+    if orjson is not None:
+        # OPT_NON_STR_KEYS: SQLAlchemy ključevi redova mogu biti str podklase
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        data, ensure_ascii=False, separators=(",", ":"), default=_default
+    ).encode("utf-8")
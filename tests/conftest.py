@@ -0,0 +1,112 @@
+import hashlib
+import http.server
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import pytest
+
+# database.py pravi engine pri importu -> DATABASE_URL mora postojati pre toga
+_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="ninko-tests-"), "test.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DB_PATH}")
+os.environ.setdefault("OPENAI_API_KEY", "")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import engine  # noqa: E402
+from migrations import run_migrations  # noqa: E402
+
+
+@pytest.fixture
+def fresh_db():
+    """
+    Empty SQLite database with the current schema; returns its URL.
+    """
+    engine.dispose()
+    path = engine.url.database
+    if os.path.exists(path):
+        os.remove(path)
+    run_migrations()
+    yield str(engine.url)
+    engine.dispose()
+
+
+def rss_document(items) -> bytes:
+    """
+    RSS 2.0 document for (guid, title, hour) tuples, newest first.
+    """
+    body = "".join(
+        f"<item><title>{title}</title><link>http://example.test/{guid}</link>"
+        f"<guid>{guid}</guid><description>&lt;img src='http://img.test/{guid}.jpg'&gt; text</description>"
+        f"<pubDate>Mon, 01 Jan 2024 {hour:02d}:00:00 GMT</pubDate></item>"
+        for guid, title, hour in items
+    )
+    return (
+        "<?xml version='1.0'?><rss version='2.0'><channel><title>test</title>"
+        f"{body}</channel></rss>"
+    ).encode()
+
+
+class FeedServer:
+    """
+    Local RSS server: `feeds[path]` = list of (guid, title, hour), newest
+    first; `hits[path]` counts requests. Sends an ETag and answers 304 to
+    a matching If-None-Match (unless `etags` is False). With `trickle` (seconds) the body
+    is sent in small chunks with that pause between them.
+    """
+
+    def __init__(self):
+        self.feeds = {}
+        self.hits = {}
+        self.trickle = None
+        self.etags = True
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.hits[self.path] = server.hits.get(self.path, 0) + 1
+                body = rss_document(server.feeds.get(self.path, []))
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()
+                if server.etags and self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/rss+xml")
+                if server.etags:
+                    self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if not server.trickle:
+                    self.wfile.write(body)
+                    return
+                try:
+                    for i in range(0, len(body), 64):
+                        self.wfile.write(body[i:i + 64])
+                        self.wfile.flush()
+                        time.sleep(server.trickle)
+                except OSError:
+                    pass  # klijent je prekinuo
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def url(self, path: str) -> str:
+        return self.base_url + path
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def feed_server():
+    server = FeedServer()
+    yield server
+    server.close()
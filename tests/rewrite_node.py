@@ -0,0 +1,34 @@
+"""
+One rewrite worker process for tests/test_ai_budget.py:
+
+    python tests/rewrite_node.py ROUNDS
+
+Runs rewrite_stage ROUNDS times with a fake AI rewrite and prints one
+JSON line with the number of AI calls it made.
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot import fetch_sources  # noqa: E402
+from bot.stages import rewrite_stage  # noqa: E402
+
+calls = []
+
+
+def fake_rewrite(title: str, raw_text: str, sport: str = "sports") -> str:
+    calls.append(title)
+    return f"{title} (rewritten)\n\n{raw_text}"
+
+
+def main(rounds: int) -> None:
+    fetch_sources.ai_rewrite_text = fake_rewrite
+    for _ in range(rounds):
+        rewrite_stage(f"test:{os.getpid()}")
+    print(json.dumps({"pid": os.getpid(), "calls": len(calls)}), flush=True)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]))
@@ -0,0 +1,71 @@
+import json
+import os
+import subprocess
+import sys
+
+from bot.ai_budget import refund_budget, reserve_budget
+from bot.work_queue import REWRITE, enqueue
+from database import SessionLocal
+from models import Article
+
+NODE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rewrite_node.py")
+
+
+def test_budget_is_shared_between_sessions(fresh_db):
+    first, second = SessionLocal(), SessionLocal()
+    try:
+        assert reserve_budget(first, 3, limit=5, window_seconds=600)[0] == 3
+        granted, window = reserve_budget(second, 3, limit=5, window_seconds=600)
+        assert granted == 2
+        assert reserve_budget(first, 3, limit=5, window_seconds=600)[0] == 0
+
+        # neiskorišćeno se vraća u isti prozor
+        refund_budget(second, 2, window)
+        assert reserve_budget(first, 3, limit=5, window_seconds=600)[0] == 2
+
+        # novi prozor -> pun budžet
+        assert reserve_budget(first, 10, limit=5, window_seconds=0)[0] == 5
+    finally:
+        first.close()
+        second.close()
+
+
+def test_queue_rewrites_stay_within_budget_across_workers(fresh_db):
+    db = SessionLocal()
+    try:
+        articles = [
+            Article(external_id=f"test/{i}", title=f"Story {i}", slug=f"story-{i}", content=f"Body {i}")
+            for i in range(30)
+        ]
+        db.add_all(articles)
+        db.flush()
+        enqueue(db, REWRITE, [(str(a.id), None) for a in articles])
+        db.commit()
+    finally:
+        db.close()
+
+    env = dict(
+        os.environ,
+        DATABASE_URL=fresh_db,
+        NEWS_MAX_AI_ARTICLES="7",
+        NEWS_QUEUE_REWRITE_BATCH="3",
+    )
+    procs = [
+        subprocess.Popen(
+            [sys.executable, NODE, "5"], env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+        )
+        for _ in range(3)
+    ]
+    calls = 0
+    for proc in procs:
+        out, err = proc.communicate(timeout=120)
+        assert proc.returncode == 0, err
+        calls += sum(json.loads(line)["calls"] for line in out.splitlines() if line.startswith("{"))
+
+    db = SessionLocal()
+    try:
+        rewritten = db.query(Article).filter(Article.ai_generated.is_(True)).count()
+    finally:
+        db.close()
+    assert calls == 7
+    assert rewritten == 7
@@ -0,0 +1,17 @@
+import time
+
+from bot import feed_fetcher
+
+
+def test_slow_feed_is_cut_off_at_deadline(feed_server, monkeypatch):
+    monkeypatch.setattr(feed_fetcher, "FEED_TIMEOUT", 0.5)
+    feed_server.feeds["/slow"] = [(f"s{i}", f"Story {i}", i % 24) for i in range(50)]
+    feed_server.trickle = 0.05
+
+    started = time.monotonic()
+    [result] = feed_fetcher.fetch_feeds([feed_server.url("/slow")])
+
+    # bez roka bi ovaj feed trajao ~5s (svaki chunk stiže pre read timeout-a)
+    assert time.monotonic() - started < 2
+    assert result["feed"] is None
+    assert result["status"] == 0
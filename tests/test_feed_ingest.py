@@ -0,0 +1,73 @@
+import pytest
+
+from database import SessionLocal
+from models import Article
+from bot import fetch_sources
+
+
+@pytest.fixture
+def one_league(monkeypatch, feed_server):
+    """
+    Bot configured with a single league reading feed_server's /news feed.
+    """
+    url = feed_server.url("/news")
+    config = {"league": "test-league", "sport": "football", "country": "test"}
+    monkeypatch.setattr(fetch_sources, "LEAGUE_CONFIG", [config])
+    monkeypatch.setattr(fetch_sources, "RSS_OVERRIDE", {"test-league": [url]})
+    return feed_server
+
+
+def _stored_guids():
+    db = SessionLocal()
+    try:
+        return sorted(a.external_id.rsplit("/", 1)[-1] for a in db.query(Article).all())
+    finally:
+        db.close()
+
+
+def _run_cycle():
+    fetch_sources.fetch_and_store_all_articles(max_per_league=10, use_ai=False)
+
+
+def test_failed_insert_is_retried_next_cycle(fresh_db, one_league, monkeypatch):
+    one_league.feeds["/news"] = [(f"a{i}", f"Story {i}", i) for i in (3, 2, 1)]
+
+    def failing_insert(db, rows):
+        raise RuntimeError("database unavailable")
+
+    with monkeypatch.context() as m:
+        m.setattr(fetch_sources, "_insert_article_rows", failing_insert)
+        _run_cycle()
+    assert _stored_guids() == []
+
+    # isti feed: entry-ji koje insert nije upisao moraju ponovo da se pročitaju
+    _run_cycle()
+    assert _stored_guids() == ["a1", "a2", "a3"]
+
+    one_league.feeds["/news"] = [(f"a{i}", f"Story {i}", i) for i in (5, 4, 3, 2, 1)]
+    _run_cycle()
+    assert _stored_guids() == ["a1", "a2", "a3", "a4", "a5"]
+
+
+def test_seen_entries_skip_db_lookups(fresh_db, one_league):
+    # bez ETag-a feed se svaki put skida ceo -> filtrira ga seen memorija
+    one_league.etags = False
+    one_league.feeds["/news"] = [(f"b{i}", f"Story {i}", i) for i in (3, 2, 1)]
+    _run_cycle()
+    assert _stored_guids() == ["b1", "b2", "b3"]
+
+    from database import engine
+    from sqlalchemy import event
+
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        if "articles" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        _run_cycle()
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert statements == []
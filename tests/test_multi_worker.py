@@ -0,0 +1,98 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from content_version import read_content_version
+from database import SessionLocal
+from models import Article, FeedState
+
+NODE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "worker_node.py")
+FEEDS = ("/league-a", "/league-b", "/league-c", "/common")
+
+# scheduler uzima 5 po ligi = 2 po feed-u (svoj + common): 3 * 2 + 2 zajednička
+EXPECTED_ARTICLES = 8
+
+
+def _run_nodes(db_url, feed_server, count, ticks, **env):
+    """
+    Start `count` scheduler nodes on the same database at once and wait
+    for all of them. Returns the JSON lines they printed.
+    """
+    node_env = dict(
+        os.environ,
+        DATABASE_URL=db_url,
+        OPENAI_API_KEY="",
+        NEWS_FEED_PER_HOST_LIMIT="16",
+        **env,
+    )
+    procs = [
+        subprocess.Popen(
+            [sys.executable, NODE, feed_server.base_url, str(ticks)],
+            env=node_env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(count)
+    ]
+    lines = []
+    for proc in procs:
+        out, err = proc.communicate(timeout=120)
+        assert proc.returncode == 0, err
+        lines.extend(json.loads(line) for line in out.splitlines() if line.startswith("{"))
+    return lines
+
+
+def _content_version():
+    db = SessionLocal()
+    try:
+        return read_content_version(db)
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def feeds(feed_server):
+    for i, path in enumerate(FEEDS):
+        feed_server.feeds[path] = [(f"{path.strip('/')}-{n}", f"Story {i} {n}", n) for n in (3, 2, 1)]
+    return feed_server
+
+
+def test_adaptive_nodes_share_feeds_and_full_run(fresh_db, feeds):
+    ticks = _run_nodes(fresh_db, feeds, count=3, ticks=1)
+
+    # svaki feed tačno jednom, pun ciklus samo na jednom node-u
+    assert feeds.hits == {path: 1 for path in FEEDS}
+    assert sum(t["full_run"] for t in ticks) == 1
+
+    db = SessionLocal()
+    try:
+        assert db.query(Article).count() == EXPECTED_ARTICLES
+        assert db.query(FeedState).filter(FeedState.locked_by.isnot(None)).count() == 0
+    finally:
+        db.close()
+
+
+def test_idle_nodes_do_not_bump_content_version(fresh_db, feeds):
+    _run_nodes(fresh_db, feeds, count=2, ticks=1)
+    version = _content_version()
+
+    # bez novih članaka: naslovna se ne menja -> nema bump-a (ni "ping-ponga")
+    _run_nodes(fresh_db, feeds, count=2, ticks=4)
+    assert _content_version() == version
+
+
+def test_interval_mode_runs_full_cycle_on_one_node(fresh_db, feeds):
+    ticks = _run_nodes(fresh_db, feeds, count=3, ticks=1, NEWS_ADAPTIVE_POLLING="0")
+
+    assert feeds.hits == {path: 1 for path in FEEDS}
+    assert len(ticks) == 3
+
+    db = SessionLocal()
+    try:
+        assert db.query(Article).count() == EXPECTED_ARTICLES
+    finally:
+        db.close()
@@ -0,0 +1,23 @@
+import time
+from datetime import datetime
+
+from bot.poll_schedule import update_schedule
+from models import FeedState
+
+
+def _result(*hours):
+    entries = [
+        {"published_parsed": time.strptime(f"2024-01-01 {h:02d}:00", "%Y-%m-%d %H:%M")}
+        for h in hours
+    ]
+    return {"feed": type("Feed", (), {"entries": entries})(), "status": 200}
+
+
+def test_single_new_entry_updates_cadence():
+    state = FeedState(url="http://feed.test/a", last_entry_at=datetime(2024, 1, 1, 8))
+
+    # rani prekid: parser vrati samo jedan novi entry
+    update_schedule(state, _result(10), datetime(2024, 1, 1, 10, 5))
+
+    assert state.publish_interval == 2 * 3600
+    assert state.last_entry_at == datetime(2024, 1, 1, 10)
@@ -0,0 +1,24 @@
+from response_cache import ResponseCache
+
+
+def _cache():
+    return ResponseCache(max_entries=10, ttl_seconds=600, version_check_seconds=0)
+
+
+def test_response_is_cached_under_current_version():
+    cache = _cache()
+    cache.set_version(1)
+    cache.set("/articles", b"[]", {}, cache.version)
+    assert cache.get("/articles").body == b"[]"
+
+
+def test_response_loaded_before_version_change_is_not_cached():
+    cache = _cache()
+    cache.set_version(1)
+    version = cache.version  # request počinje load() sa starim podacima
+
+    cache.set_version(2)  # drugi request vidi novu verziju i briše keš
+    entry = cache.set("/articles", b"[old]", {}, version)
+
+    assert entry.body == b"[old]"
+    assert cache.get("/articles") is None
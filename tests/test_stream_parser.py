@@ -0,0 +1,25 @@
+from bot.stream_parser import StreamingFeedParser
+
+from conftest import rss_document
+
+
+def _parse(items, **kwargs):
+    parser = StreamingFeedParser(**kwargs)
+    parser.feed(rss_document(items))
+    return [entry["id"] for entry in parser.close().entries]
+
+
+def test_stops_at_known_entry_below_new_ones():
+    items = [("c", "C", 3), ("b", "B", 2), ("a", "A", 1)]
+    assert _parse(items, stop_at="b") == ["c"]
+
+
+def test_known_entry_on_top_does_not_stop():
+    # "zakucan" entry na vrhu: ispod njega se i dalje čita do limita
+    items = [("pinned", "P", 1), ("y", "Y", 3), ("x", "X", 2)]
+    assert _parse(items, stop_at="pinned", limit=2) == ["pinned", "y"]
+
+
+def test_limit():
+    items = [(str(i), str(i), i) for i in range(10)]
+    assert _parse(items, limit=3) == ["0", "1", "2"]
@@ -0,0 +1,41 @@
+"""
+One scheduler node for tests/test_multi_worker.py:
+
+    python tests/worker_node.py FEED_BASE_URL TICKS
+
+Leagues read FEED_BASE_URL/<league> plus a shared FEED_BASE_URL/common
+feed. Runs TICKS scheduler ticks (interval_job() when
+NEWS_ADAPTIVE_POLLING=0) and prints one JSON line per tick.
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot import fetch_sources  # noqa: E402
+from bot import scheduler  # noqa: E402
+
+LEAGUES = ("league-a", "league-b", "league-c")
+
+
+def main(base_url: str, ticks: int) -> None:
+    fetch_sources.LEAGUE_CONFIG[:] = [
+        {"league": league, "sport": "football", "country": "test"} for league in LEAGUES
+    ]
+    fetch_sources.RSS_OVERRIDE.clear()
+    for league in LEAGUES:
+        fetch_sources.RSS_OVERRIDE[league] = [f"{base_url}/{league}", f"{base_url}/common"]
+
+    for _ in range(ticks):
+        if scheduler.ADAPTIVE_POLLING:
+            scheduler.tick()
+        else:
+            scheduler.interval_job()
+        print(json.dumps({"pid": os.getpid(), "full_run": scheduler._last_full_run is not None}), flush=True)
+        time.sleep(0.2)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1], int(sys.argv[2]))